@@ -0,0 +1,142 @@
+import asyncio
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple, Type
+
+from django.db import models, transaction
+from django.db.models.signals import post_save, pre_save
+
+from . import cache
+from .executors import database_sync_to_async, is_pinned
+
+
+_write_buffer: ContextVar[Optional["WriteBuffer"]] = ContextVar("asgimod_write_buffer", default=None)
+
+
+class WriteBuffer:
+
+    def __init__(self, max_delay: float = 0.005, max_size: int = 1000) -> None:
+        if max_size <= 0:
+            raise ValueError("Max size must be strictly positive.")
+        self.max_delay = max_delay
+        self.max_size = max_size
+        self._pending: Dict[Tuple[str, Type[models.Model], Optional[Tuple[str, ...]]], List[Tuple[models.Model, asyncio.Future]]] = {}
+        self._size = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+
+    def save(self, instance: models.Model, using: str, force_insert: bool = False, force_update: bool = False, update_fields: Optional[Sequence[str]] = None) -> Optional["asyncio.Future[None]"]:
+        model = instance.__class__
+        if is_pinned(using) or model._meta.parents or not can_bulk_save(model):
+            # NOTE: WRITES WITHIN `aatomic()`, MULTI-TABLE INHERITANCE MODELS AND MODELS WITH
+            #       CUSTOM `save()` OR SAVE SIGNAL RECEIVERS ARE NOT BUFFERED.
+            return None
+        if update_fields is not None:
+            if not update_fields or force_insert or instance._state.adding:
+                return None
+            fields = tuple(sorted(update_fields))
+            if any(getattr(model._meta.get_field(name), "auto_now", False) for name in fields if name != "pk"):
+                # NOTE: `bulk_update()` DOES NOT REFRESH `auto_now` FIELDS.
+                return None
+        elif instance._state.adding and not force_update:
+            fields = None
+        else:
+            return None
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault((using, model, fields), []).append((instance, future))
+        self._size += 1
+        if self._size >= self.max_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self.flush)
+        return future
+
+    def flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending, self._size = self._pending, {}, 0
+        batches_by_db: Dict[str, list] = {}
+        for (using, model, fields), items in pending.items():
+            batches_by_db.setdefault(using, []).append((model, fields, items))
+        for using, batches in batches_by_db.items():
+            task = asyncio.ensure_future(self._write_batches(using, batches))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def aflush(self) -> None:
+        self.flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _write_batches(self, using: str, batches: list) -> None:
+        try:
+            results = await database_sync_to_async(self._write_all, using)(using, [(model, fields, [instance for instance, _ in items]) for model, fields, items in batches])
+        except Exception as e:
+            results = [[e] * len(items) for _, _, items in batches]
+        for (_, _, items), errors in zip(batches, results):
+            for (_, future), error in zip(items, errors):
+                if future.done():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(None)
+
+    @staticmethod
+    def _write_all(using: str, batches: list) -> List[List[Optional[Exception]]]:
+        results = []
+        for model, fields, instances in batches:
+            manager = model._base_manager.db_manager(using)
+            try:
+                # NOTE: WRITES ARE SAVEPOINTED, A FAILED BATCH MUST NOT BREAK AN OUTER TRANSACTION.
+                with transaction.atomic(using):
+                    if fields is None:
+                        manager.bulk_create(instances)
+                    else:
+                        # NOTE: THE LAST SAVED STATE OF AN INSTANCE WINS, AS IF SAVED SEQUENTIALLY.
+                        manager.bulk_update(list({instance.pk: instance for instance in instances}.values()), fields)
+                results.append([None] * len(instances))
+            except Exception:
+                # CAUTION: the bulk write is atomic, instances are saved one by one to fail the right callers
+                results.append([WriteBuffer._save(instance, using, fields) for instance in instances])
+            finally:
+                cache.invalidate_model(model)
+        return results
+
+    @staticmethod
+    def _save(instance: models.Model, using: str, fields: Optional[Tuple[str, ...]]) -> Optional[Exception]:
+        try:
+            with transaction.atomic(using):
+                instance.save(using=using, force_insert=fields is None, update_fields=fields)
+        except Exception as e:
+            return e
+        return None
+
+
+def can_bulk_save(model: Type[models.Model]) -> bool:
+    if model.save is not models.Model.save:
+        return False
+    # NOTE: THE RECEIVERS OF THE CACHE ARE IGNORED, BULK WRITES INVALIDATE THE CACHE THEMSELVES.
+    senders = {id(model), id(None)}
+    for signal in (pre_save, post_save):
+        for (receiver, sender), *_ in signal.receivers:
+            if sender in senders and receiver != "asgimod_cache_post_save":
+                return False
+    return True
+
+
+def get_write_buffer() -> Optional[WriteBuffer]:
+    return _write_buffer.get()
+
+
+@asynccontextmanager
+async def buffer_writes(max_delay: float = 0.005, max_size: int = 1000):
+    buffer = WriteBuffer(max_delay=max_delay, max_size=max_size)
+    token = _write_buffer.set(buffer)
+    try:
+        yield buffer
+    finally:
+        _write_buffer.reset(token)
+        await buffer.aflush()
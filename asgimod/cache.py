@@ -0,0 +1,236 @@
+import hashlib
+import time
+from collections import OrderedDict
+from copy import copy
+from threading import Lock
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple, Type, TypeVar
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.db import connections, models
+from django.db.models.fields.related import lazy_related_operation
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.db.models.utils import make_model_tuple
+from django.utils.module_loading import import_string
+
+from .conf import get_setting
+from .sync import sync_to_async
+
+
+R = TypeVar("R")
+
+_backend: Optional["BaseCacheBackend"] = None
+_quoted_tables: Dict[str, List[Tuple[str, str]]] = {}
+_connected_tables: Set[str] = set()
+_connected_models: Set[Type[models.Model]] = set()
+_lock = Lock()
+
+
+class BaseCacheBackend:
+
+    async def aget_versions(self, tables: Iterable[str]) -> Tuple[Any, ...]:
+        raise NotImplementedError("subclasses of 'BaseCacheBackend' must provide a `aget_versions()` method")
+
+    async def aget(self, key: Hashable) -> Tuple[bool, Any]:
+        raise NotImplementedError("subclasses of 'BaseCacheBackend' must provide a `aget()` method")
+
+    async def aset(self, key: Hashable, value: Any, ttl: Optional[float]) -> None:
+        raise NotImplementedError("subclasses of 'BaseCacheBackend' must provide a `aset()` method")
+
+    def invalidate(self, tables: Iterable[str]) -> None:
+        raise NotImplementedError("subclasses of 'BaseCacheBackend' must provide a `invalidate()` method")
+
+
+class LocMemBackend(BaseCacheBackend):
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, Tuple[Optional[float], Any]]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self._lock = Lock()
+
+    async def aget_versions(self, tables: Iterable[str]) -> Tuple[Any, ...]:
+        return tuple(self._versions.get(table, 0) for table in tables)
+
+    async def aget(self, key: Hashable) -> Tuple[bool, Any]:
+        with self._lock:
+            try:
+                expires, value = self._entries[key]
+            except KeyError:
+                return False, None
+            if expires is not None and expires <= time.monotonic():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, value
+
+    async def aset(self, key: Hashable, value: Any, ttl: Optional[float]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl if ttl is not None else None, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, tables: Iterable[str]) -> None:
+        # NOTE: ENTRIES ARE KEYED ON TABLE VERSIONS, STALE ENTRIES ARE NEVER HIT AGAIN AND EVICTED BY LRU.
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+
+
+class DjangoCacheBackend(BaseCacheBackend):
+
+    def __init__(self, alias: str = "default", key_prefix: str = "asgimod") -> None:
+        self.cache = caches[alias]
+        self.key_prefix = key_prefix
+
+    def _version_key(self, table: str) -> str:
+        return f"{self.key_prefix}:version:{table}"
+
+    def _get_versions(self, tables: Tuple[str, ...]) -> Tuple[Any, ...]:
+        keys = [self._version_key(table) for table in tables]
+        versions = self.cache.get_many(keys)
+        for key in keys:
+            if key not in versions:
+                # CAUTION: an evicted version must not resurrect entries stored under a previous version
+                self.cache.add(key, time.time_ns(), timeout=None)
+                versions[key] = self.cache.get(key)
+        return tuple(versions[key] for key in keys)
+
+    def _get_key(self, key: Hashable) -> str:
+        return f"{self.key_prefix}:query:{hashlib.md5(repr(key).encode()).hexdigest()}"
+
+    async def aget_versions(self, tables: Iterable[str]) -> Tuple[Any, ...]:
+        return await sync_to_async(self._get_versions, thread_sensitive=False)(tuple(tables))
+
+    async def aget(self, key: Hashable) -> Tuple[bool, Any]:
+        missing = object()
+        value = await sync_to_async(self.cache.get, thread_sensitive=False)(self._get_key(key), missing)
+        if value is missing:
+            return False, None
+        return True, value
+
+    async def aset(self, key: Hashable, value: Any, ttl: Optional[float]) -> None:
+        await sync_to_async(self.cache.set, thread_sensitive=False)(self._get_key(key), value, ttl)
+
+    def invalidate(self, tables: Iterable[str]) -> None:
+        for table in tables:
+            try:
+                self.cache.incr(self._version_key(table))
+            except ValueError:
+                self.cache.add(self._version_key(table), time.time_ns(), timeout=None)
+
+
+def get_cache() -> BaseCacheBackend:
+    global _backend
+    if _backend is not None:
+        return _backend
+    config = get_setting("CACHE")
+    if not config:
+        raise ImproperlyConfigured("ASGIMOD['CACHE'] must be configured to cache async queries")
+    with _lock:
+        if _backend is None:
+            _backend = import_string(config.get("BACKEND", "asgimod.cache.LocMemBackend"))(**config.get("OPTIONS", {}))
+            for model in config.get("MODELS", ()):
+                # NOTE: MODELS MAY NOT BE LOADED YET (E.G. ON IMPORT), THE RECEIVERS ARE CONNECTED ONCE THEY ARE.
+                apps.lazy_model_operation(_connect_model_writes, make_model_tuple(model))
+    return _backend
+
+
+def get_tables(sql: str, using: str) -> Tuple[str, ...]:
+    try:
+        quoted_tables = _quoted_tables[using]
+    except KeyError:
+        quote_name = connections[using].ops.quote_name
+        tables = {model._meta.db_table for model in apps.get_models(include_auto_created=True)}
+        quoted_tables = _quoted_tables[using] = [(quote_name(table), table) for table in sorted(tables)]
+    return tuple(table for quoted, table in quoted_tables if quoted in sql)
+
+
+def invalidate_model(model: Type[models.Model]) -> None:
+    if _backend is not None:
+        _backend.invalidate(parent._meta.db_table for parent in [model, *model._meta.get_parent_list()])
+
+
+def copy_result(value: R) -> R:
+    if isinstance(value, list):
+        return [copy(item) for item in value]
+    if isinstance(value, dict):
+        return {key: copy(item) for key, item in value.items()}
+    return copy(value)
+
+
+async def cached_call(key: Hashable, using: str, ttl: Optional[float], call: Callable[[], Awaitable[R]]) -> R:
+    backend = get_cache()
+    if ttl is None:
+        ttl = get_setting("CACHE").get("TTL")
+    # NOTE: QUERY KEYS ARE (METHOD, USING, SQL, PARAMS, ARGS, KWARGS), SEE `flights.query_key`.
+    tables = get_tables(key[2], using)
+    _connect_tables(tables)
+    key = (key, await backend.aget_versions(tables))
+    hit, value = await backend.aget(key)
+    if hit:
+        return copy_result(value)
+    value = await call()
+    await backend.aset(key, copy_result(value), ttl)
+    return value
+
+
+def _invalidate_sender(sender, **kwargs):
+    invalidate_model(sender)
+
+
+def _connect_tables(tables: Iterable[str]) -> None:
+    # CAUTION: post_delete receivers disable fast deletes, signals are only connected for the models writing to cached tables
+    tables = [table for table in tables if table not in _connected_tables]
+    if not tables:
+        return
+    with _lock:
+        for model in apps.get_models(include_auto_created=True):
+            if any(parent._meta.db_table in tables for parent in [model, *model._meta.get_parent_list()]):
+                _connect_model(model)
+        _connected_tables.update(tables)
+
+
+def _connect_model_writes(model: Type[models.Model]) -> None:
+    _connect_model(model)
+    for field in model._meta.local_many_to_many:
+        lazy_related_operation(_connect_through, model, field.remote_field.through)
+
+
+def _connect_through(model: Type[models.Model], through: Type[models.Model]) -> None:
+    _connect_model(through)
+
+
+def _connect_model(model: Type[models.Model]) -> None:
+    post_save.connect(_invalidate_sender, sender=model, weak=False, dispatch_uid="asgimod_cache_post_save")
+    post_delete.connect(_invalidate_sender, sender=model, weak=False, dispatch_uid="asgimod_cache_post_delete")
+    m2m_changed.connect(_invalidate_sender, sender=model, weak=False, dispatch_uid="asgimod_cache_m2m_changed")
+    _connected_models.add(model)
+
+
+def _disconnect_models() -> None:
+    with _lock:
+        for model in _connected_models:
+            post_save.disconnect(sender=model, dispatch_uid="asgimod_cache_post_save")
+            post_delete.disconnect(sender=model, dispatch_uid="asgimod_cache_post_delete")
+            m2m_changed.disconnect(sender=model, dispatch_uid="asgimod_cache_m2m_changed")
+        _connected_models.clear()
+        _connected_tables.clear()
+
+
+def _reset(*, setting, **kwargs):
+    global _backend
+    if setting == "ASGIMOD":
+        _backend = None
+        _disconnect_models()
+
+
+setting_changed.connect(_reset)
+
+if settings.configured and get_setting("CACHE"):
+    # NOTE: WRITES OF THIS PROCESS TO `MODELS` MUST INVALIDATE SHARED CACHES EVEN IF IT NEVER READS FROM THEM.
+    get_cache()
@@ -0,0 +1,135 @@
+import array
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.db.models.query import QuerySet
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# NOTE: INTERNAL FIELD TYPE -> (NUMPY DTYPE, `array.array` TYPECODE),
+#       A `None` TYPECODE BUILDS A LIST. DECIMALS STAY `Decimal` OBJECTS,
+#       FLOATS WOULD SILENTLY LOSE PRECISION (E.G. ON MONEY COLUMNS).
+DTYPES: Dict[str, Tuple[Any, Optional[str]]] = {
+    "AutoField": ("int64", "q"),
+    "BigAutoField": ("int64", "q"),
+    "SmallAutoField": ("int64", "q"),
+    "IntegerField": ("int64", "q"),
+    "BigIntegerField": ("int64", "q"),
+    "SmallIntegerField": ("int64", "q"),
+    "PositiveIntegerField": ("int64", "q"),
+    "PositiveBigIntegerField": ("int64", "q"),
+    "PositiveSmallIntegerField": ("int64", "q"),
+    "FloatField": ("float64", "d"),
+    "BooleanField": ("bool", "b"),
+    "DateField": ("datetime64[D]", None),
+    "DateTimeField": ("datetime64[us]", None),
+}
+DEFAULT_DTYPE = (object, None)
+
+
+class ColumnBuilder:
+
+    def __init__(self, dtype: Any) -> None:
+        self.dtype = dtype
+        self._parts: List[Any] = []
+
+    def extend(self, values: Tuple[Any, ...]) -> None:
+        raise NotImplementedError("subclasses of 'ColumnBuilder' must provide a `extend()` method")
+
+    def build(self) -> Any:
+        raise NotImplementedError("subclasses of 'ColumnBuilder' must provide a `build()` method")
+
+
+class NumpyColumnBuilder(ColumnBuilder):
+
+    def __init__(self, dtype: Any) -> None:
+        super().__init__(numpy.dtype(dtype))
+
+    def extend(self, values: Tuple[Any, ...]) -> None:
+        if self.dtype.kind == "f":
+            values = [numpy.nan if value is None else value for value in values]
+        elif self.dtype.kind == "M":
+            # NOTE: NUMPY DATETIMES ARE NAIVE, AWARE DATETIMES ARE CONVERTED TO UTC.
+            values = [value.astimezone(timezone.utc).replace(tzinfo=None) if isinstance(value, datetime) and value.tzinfo is not None else value for value in values]
+        try:
+            if self.dtype.kind in "biu" and None in values:
+                # NOTE: NUMPY WOULD SILENTLY CAST NULL BOOLEANS TO FALSE.
+                raise TypeError
+            self._parts.append(numpy.array(values, dtype=self.dtype))
+        except (TypeError, ValueError):
+            # CAUTION: values not fitting the dtype (e.g. NULL integers) turn the column into an object column
+            self.dtype = numpy.dtype(object)
+            self._parts = [part.astype(object) for part in self._parts]
+            self._parts.append(numpy.array(values, dtype=object))
+
+    def build(self) -> Any:
+        if not self._parts:
+            return numpy.array([], dtype=self.dtype)
+        return numpy.concatenate(self._parts)
+
+
+class ArrayColumnBuilder(ColumnBuilder):
+
+    def __init__(self, dtype: Optional[str]) -> None:
+        super().__init__(None if dtype is object else dtype)
+        self._column = array.array(self.dtype) if self.dtype is not None else []
+
+    def extend(self, values: Tuple[Any, ...]) -> None:
+        if self.dtype in ("f", "d"):
+            values = [float("nan") if value is None else value for value in values]
+        try:
+            values = array.array(self.dtype, values) if self.dtype is not None else values
+        except TypeError:
+            # CAUTION: values not fitting the typecode (e.g. NULL integers) turn the column into a list
+            self.dtype = None
+            self._column = list(self._column)
+        self._column.extend(values)
+
+    def build(self) -> Any:
+        return self._column
+
+
+def get_column_builder(output_field: Any, dtype: Any = None) -> ColumnBuilder:
+    if dtype is None:
+        if output_field is not None and output_field.is_relation:
+            output_field = output_field.target_field
+        dtype = DTYPES.get(output_field.get_internal_type(), DEFAULT_DTYPE) if output_field is not None else DEFAULT_DTYPE
+        dtype = dtype[0] if numpy is not None else dtype[1]
+    if numpy is not None:
+        return NumpyColumnBuilder(dtype)
+    return ArrayColumnBuilder(dtype)
+
+
+def check_dtypes(dtypes: Dict[str, Any]) -> None:
+    if numpy is not None:
+        return
+    for name, dtype in dtypes.items():
+        if dtype is not object and dtype not in list(array.typecodes):
+            raise ValueError("Column %r requires NumPy for dtype %r, without NumPy dtypes must be `object` or one of the `array.array` typecodes %r" % (name, dtype, array.typecodes))
+
+
+def fetch_columns(queryset: QuerySet, using: str, dtypes: Optional[Dict[str, Any]] = None, chunk_size: int = 2000) -> Dict[str, Any]:
+    check_dtypes(dtypes or {})
+    query = queryset.query
+    # NOTE: SAME COLUMN ORDER AS THE SQL, SEE `django.db.models.query.NamedValuesListIterable`.
+    names = [*query.extra_select, *query.values_select, *query.annotation_select]
+    compiler = query.get_compiler(using)
+    rows = compiler.results_iter(chunked_fetch=True, chunk_size=chunk_size)
+    builders = None
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if builders is None:
+            # NOTE: THE OUTPUT FIELDS ARE KNOWN ONCE THE COMPILER HAS SET UP THE QUERY.
+            select = getattr(compiler, "select", None) or [(None, None, None)] * len(names)
+            builders = [get_column_builder(getattr(expression, "output_field", None), (dtypes or {}).get(name)) for name, (expression, _, _) in zip(names, select)]
+        if not chunk:
+            break
+        # NOTE: ROWS ONLY LIVE AS LONG AS THEIR CHUNK, COLUMNS ARE BUILT PER CHUNK.
+        for builder, values in zip(builders, zip(*chunk)):
+            builder.extend(values)
+    return {name: builder.build() for name, builder in zip(names, builders)}
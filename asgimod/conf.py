@@ -0,0 +1,30 @@
+from typing import Any
+
+from django.conf import settings
+
+
+DEFAULTS = {
+    "EXECUTOR": "thread_sensitive",
+    "POOL_SIZE": 10,
+    "DRIVERS": {},
+    "CACHE": None,
+    "MAX_CONCURRENCY": None,
+    "MAX_QUEUE": None,
+    "QUEUE_TIMEOUT": None,
+    "REPLICAS": {},
+    "SINKS": [],
+    "SLOW_QUERIES": None,
+}
+
+
+def get_setting(name: str) -> Any:
+    return getattr(settings, "ASGIMOD", {}).get(name, DEFAULTS[name])
+
+
+def get_alias_setting(name: str, using: str) -> Any:
+    # NOTE: ALIAS SETTINGS ARE EITHER A VALUE FOR ALL ALIASES
+    #       OR A DICT OF VALUES KEYED BY DATABASE ALIAS.
+    value = get_setting(name)
+    if isinstance(value, dict):
+        return value.get(using, DEFAULTS[name])
+    return value
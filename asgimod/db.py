@@ -1,13 +1,52 @@
+import asyncio
+from collections import deque
 from datetime import datetime, date
-from typing import Any, Awaitable, Dict, Generic, List, NoReturn, Optional, Tuple, Type, TypeVar, Union
+from functools import partial, wraps
+from itertools import islice
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, Generic, Iterable, List, NoReturn, Optional, Tuple, Type, TypeVar, Union
 
-from django.db import models
-from django.db.models.query import QuerySet
+from django.apps import apps
+from django.db import models, router
+from django.db.models.query import QuerySet, RawQuerySet, prefetch_related_objects
 
-from .sync import sync_to_async
+from . import cache, engines, flights, identity, pagination
+from .executors import acquire_pinned_executor, batch_calls, database_sync_to_async, is_pinned, release_pinned_executor
+from .interrupts import interruptible
+from .routers import mark_written
+from .rows import NamedRowIterable, RowIterable
+from .columns import fetch_columns
 
 
 T = TypeVar("T", bound=models.Model)
+R = TypeVar("R")
+
+
+def queryset_sync_to_async(for_write: bool = False, read: bool = False) -> Callable[[Callable[..., R]], Callable[..., Awaitable[R]]]:
+
+    def decorator(func: Callable[..., R]) -> Callable[..., Awaitable[R]]:
+
+        @wraps(func)
+        async def wrapper(self: "AsyncQuerySet", *args, **kwargs):
+            # NOTE: THE CALL IS RESOLVED WHEN AWAITED, SO IT RUNS WITH THE CONTEXT OF THE AWAITING TASK.
+            using = self._get_db(for_write)
+            call = partial(database_sync_to_async(func, using), self, *args, **kwargs)
+            if read:
+                return await self._timed(self._read(using, func.__name__, call, args, kwargs))
+            return await self._timed(call())
+
+        return wrapper
+
+    return decorator
+
+
+def _get_result_cache(queryset: Any) -> Optional[List[Any]]:
+    # NOTE: RELATED MANAGERS RETURN THEIR PREFETCHED (EVALUATED) QUERYSET
+    #       IF THE RELATION WAS PREFETCHED ON THE INSTANCE.
+    if isinstance(queryset, models.Manager) and getattr(getattr(queryset, "instance", None), "_prefetched_objects_cache", None):
+        queryset = queryset.get_queryset()
+    if isinstance(queryset, QuerySet):
+        return queryset._result_cache
+    return None
 
 
 class AsyncQuerySet(Generic[T]):
@@ -16,18 +55,30 @@ class AsyncQuerySet(Generic[T]):
         self._cls = cls
         self._queryset = queryset
         self._to_exec = self._queryset if self._queryset is not None else self._cls.objects
+        self._result_cache: Optional[List[Any]] = _get_result_cache(self._to_exec)
+        self._options: Dict[str, Any] = {}
+
+    def _chain(self, queryset: QuerySet[T], **options) -> "AsyncQuerySet[T]":
+        clone = self.__class__(self._cls, queryset)
+        clone._options = {**self._options, **options}
+        return clone
 
     # MAGIC METHODS - ITERATORS ITERABLES
 
-    async def __aiter__(self):
-        items = await self.eval()
-        for item in items:
+    def __aiter__(self):
+        if self._result_cache is not None:
+            return self._iter_result_cache()
+        return self.iterator()
+
+    async def _iter_result_cache(self):
+        for item in self._result_cache:
             yield item
 
     def __getitem__(self, val: Union[slice, int, Any]):
-        # CAUTION: it is not handling slice steps which would evaluates the sync queryset
-        if isinstance(val, slice):
-            return self.__class__(self._cls, self._to_exec[val])
+        # NOTE: SLICES WITH STEPS ARE EVALUATED BY THE SYNC QUERYSET,
+        #       THEREFORE THEY ARE RETURNED AS AWAITABLES OF LISTS.
+        if isinstance(val, slice) and val.step is None:
+            return self._chain(self._to_exec[val])
         else:
             return self.item(val)
 
@@ -48,218 +99,608 @@ class AsyncQuerySet(Generic[T]):
     # MAGIC METHODS - OPERATORS
 
     def __and__(self, val: "AsyncQuerySet[T]"):
-        return self.__class__(self._cls, self._to_exec & val._to_exec)
+        return self._chain(self._to_exec & val._to_exec)
 
     def __or__(self, val: "AsyncQuerySet[T]"):
-        return self.__class__(self._cls, self._to_exec | val._to_exec)
+        return self._chain(self._to_exec | val._to_exec)
 
     # METHODS FOR EVALUATION OF QUERYSETS
 
-    async def item(self, val: Union[int, Any]):
+    async def item(self, val: Union[int, slice, Any]):
+        if self._result_cache is not None:
+            return self._result_cache[val]
+        if isinstance(val, (int, slice)):
+            return await self._timed(database_sync_to_async(self._get_item, self._get_db())(val))
         return (await self.eval())[val]
 
-    def eval(self) -> Awaitable[Union[List[T], Dict[str, Any], List[Tuple], List, List[datetime], List[date]]]:
-        return sync_to_async(list)(self._to_exec)
+    def _get_item(self, val: Union[int, slice]):
+        queryset = self._get_queryset()
+        if not isinstance(queryset, QuerySet):
+            return list(queryset)[val]
+        if isinstance(val, slice) or val >= 0:
+            return queryset[val]
+        if queryset.query.low_mark or queryset.query.high_mark is not None:
+            # CAUTION: a sliced query cannot be reversed, index is resolved from the count of the slice
+            index = queryset.count() + val
+            if index < 0:
+                raise IndexError("AsyncQuerySet index out of range")
+            return queryset[index]
+        queryset = queryset.reverse() if queryset.ordered else queryset.order_by("-pk")
+        return queryset[-val - 1]
+
+    async def eval(self) -> Union[List[T], Dict[str, Any], List[Tuple], List, List[datetime], List[date]]:
+        if self._result_cache is None:
+            using = self._get_db()
+            self._result_cache = await self._timed(self._read(using, "eval", partial(self._fetch_all, using)))
+        return list(self._result_cache)
+
+    async def _fetch_all(self, using: str) -> List[Any]:
+        queryset = self._get_queryset()
+        driver = engines.get_driver(using)
+        if driver is not None and engines.can_execute(queryset) and not is_pinned(using):
+            return await interruptible(engines.execute, using, None)(queryset, using, driver)
+        return await database_sync_to_async(list, using)(queryset)
+
+    def refresh(self) -> "AsyncQuerySet[T]":
+        self._result_cache = None
+        if isinstance(self._to_exec, QuerySet):
+            # NOTE: THE INTERNAL SYNC QUERYSET ALSO CACHES ITS RESULTS ONCE EVALUATED.
+            self._to_exec = self._to_exec.all()
+        return self
+
+    def _timed(self, awaitable: Awaitable[R]) -> Awaitable[R]:
+        # NOTE: ON TIMEOUT THE CALL IS CANCELLED, WHICH INTERRUPTS ITS RUNNING STATEMENT.
+        timeout = self._options.get("timeout")
+        if timeout is None:
+            return awaitable
+        return asyncio.wait_for(awaitable, timeout)
+
+    def _get_queryset(self):
+        return self._to_exec.all() if isinstance(self._to_exec, models.Manager) else self._to_exec
+
+    def _read(self, using: str, method: str, call: Callable[[], Awaitable[R]], args: tuple = (), kwargs: Optional[dict] = None) -> Awaitable[R]:
+        single_flight, cached = self._options.get("single_flight"), self._options.get("cached")
+        if not single_flight and not cached or is_pinned(using):
+            # CAUTION: reads within `aatomic()` may see uncommitted writes, they are never shared
+            return call()
+        key = self._get_query_key(using, method, args, kwargs or {})
+        if key is None:
+            return call()
+        if single_flight:
+            call = partial(flights.single_flight, key, call)
+        if cached:
+            return cache.cached_call(key, using, self._options.get("cache_ttl"), call)
+        return call()
+
+    def _get_query_key(self, using: str, method: str, args: tuple, kwargs: dict):
+        queryset = self._get_queryset()
+        # NOTE: LOOKUPS ARE KEYED ON THE COMPILED SQL, NOT ON THEIR REPR.
+        try:
+            if method == "_get":
+                queryset, args, kwargs = queryset.filter(*args, **kwargs), (), {}
+            elif method == "_in_bulk":
+                id_list, field_name = kwargs.get("id_list", args[0] if args else None), kwargs.get("field_name", "pk")
+                if id_list is not None:
+                    queryset = queryset.filter(**{f"{field_name}__in": id_list})
+                args, kwargs = (), {"field_name": field_name}
+        except Exception:
+            return None
+        return flights.query_key(queryset, using, method, args, kwargs)
+
+    def _get_db(self, for_write: bool = False) -> str:
+        # NOTE: SAME RULE AS `QuerySet.db`, E.G. `select_for_update()` READS RUN ON THE WRITE ALIAS.
+        if for_write or getattr(self._to_exec, "_for_write", False):
+            using = self._to_exec._db or router.db_for_write(self._cls, **self._to_exec._hints)
+            mark_written(using)
+            return using
+        return self._to_exec._db or router.db_for_read(self._cls, **self._to_exec._hints)
+
+    async def achunks(self, chunk_size: int = 2000, read_ahead: bool = False) -> AsyncIterator[List[Any]]:
+        if chunk_size <= 0:
+            raise ValueError("Chunk size must be strictly positive.")
+        queryset = self._get_queryset()
+        lookups = queryset._prefetch_related_lookups
+        if lookups:
+            # NOTE: PREFETCH IS DONE PER CHUNK INSIDE THE SAME THREAD HOP,
+            #       INDEPENDENTLY OF THE DJANGO VERSION `iterator()` BEHAVIOR.
+            queryset = queryset.prefetch_related(None)
+        rows = None
+        using = self._get_db()
+        # NOTE: WITHIN `aatomic()` THE CALLS ARE ALREADY PINNED TO THE TRANSACTION EXECUTOR.
+        pinned = is_pinned(using)
+        executor = None if pinned else acquire_pinned_executor(using)
+
+        def fetch_chunk():
+            nonlocal rows
+            if rows is None:
+                # NOTE: `RawQuerySet.iterator()` DOES NOT TAKE A CHUNK SIZE.
+                rows = queryset.iterator() if isinstance(queryset, RawQuerySet) else queryset.iterator(chunk_size=chunk_size)
+            chunk = list(islice(rows, chunk_size))
+            if lookups and chunk:
+                prefetch_related_objects(chunk, *lookups)
+            return chunk
+
+        fetch_chunk_async = database_sync_to_async(fetch_chunk, using, executor)
+        fetch = lambda: self._timed(fetch_chunk_async())
+        pending = None
+        try:
+            chunk = await fetch()
+            while chunk:
+                exhausted = len(chunk) < chunk_size
+                if read_ahead and not exhausted:
+                    pending = asyncio.ensure_future(fetch())
+                yield chunk
+                if exhausted:
+                    break
+                if pending is not None:
+                    chunk, pending = await pending, None
+                else:
+                    chunk = await fetch()
+        finally:
+            if pending is not None:
+                # CAUTION: the sync generator must not be closed while a chunk is being fetched
+                await asyncio.gather(pending, return_exceptions=True)
+            try:
+                if rows is not None:
+                    await database_sync_to_async(rows.close, using, executor)()
+            finally:
+                if not pinned:
+                    release_pinned_executor(executor, using)
 
     # METHODS THAT RETURNS QUERYSETS
 
     def filter(self, *args, **kwargs):
-        return self.__class__(self._cls, self._to_exec.filter(*args, **kwargs))
+        return self._chain(self._to_exec.filter(*args, **kwargs))
 
     def exclude(self, *args, **kwargs):
-        return self.__class__(self._cls, self._to_exec.exclude(*args, **kwargs))
+        return self._chain(self._to_exec.exclude(*args, **kwargs))
 
     def annotate(self, *args, **kwargs):
-        return self.__class__(self._cls, self._to_exec.annotate(*args, **kwargs))
+        return self._chain(self._to_exec.annotate(*args, **kwargs))
 
     def alias(self, *args, **kwargs):
-        return self.__class__(self._cls, self._to_exec.alias(*args, **kwargs))
+        return self._chain(self._to_exec.alias(*args, **kwargs))
 
     def order_by(self, *fields):
-        return self.__class__(self._cls, self._to_exec.order_by(*fields))
+        return self._chain(self._to_exec.order_by(*fields))
 
     def reverse(self):
-        return self.__class__(self._cls, self._to_exec.reverse())
+        return self._chain(self._to_exec.reverse())
 
     def distinct(self, *fields):
-        return self.__class__(self._cls, self._to_exec.distinct(*fields))
+        return self._chain(self._to_exec.distinct(*fields))
 
     def values(self, *fields, **expressions):
-        return self.__class__(self._cls, self._to_exec.values(*fields, **expressions))
+        return self._chain(self._to_exec.values(*fields, **expressions))
 
     def values_list(self, *fields, flat=False, named=False):
-        return self.__class__(self._cls, self._to_exec.values_list(*fields, flat=flat, named=named))
+        return self._chain(self._to_exec.values_list(*fields, flat=flat, named=named))
+
+    def rows(self, *fields, named=False):
+        # NOTE: ROWS ARE BUILT FROM THE CURSOR ROWS WITHOUT MODEL INSTANTIATION NOR DICT BUILDING,
+        #       ONLY THE COLUMNS HAVING DATABASE CONVERTERS ARE CONVERTED.
+        queryset = self._to_exec.values_list(*fields)
+        queryset._iterable_class = NamedRowIterable if named else RowIterable
+        return self._chain(queryset)
 
     def dates(self, field, kind, order='ASC'):
-        return self.__class__(self._cls, self._to_exec.dates(field, kind, order=order))
+        return self._chain(self._to_exec.dates(field, kind, order=order))
 
     def datetimes(self, field_name, kind, order='ASC', tzinfo=None, is_dst=None):
-        return self.__class__(self._cls, self._to_exec.datetimes(field_name, kind, order=order, tzinfo=tzinfo, is_dst=is_dst))
+        return self._chain(self._to_exec.datetimes(field_name, kind, order=order, tzinfo=tzinfo, is_dst=is_dst))
 
     def none(self):
-        return self.__class__(self._cls, self._to_exec.none())
+        return self._chain(self._to_exec.none())
 
     def all(self):
-        return self.__class__(self._cls, self._to_exec.all())
+        return self._chain(self._to_exec.all())
 
     def union(self, *other_qs: "AsyncQuerySet[T]", all=False):
-        return self.__class__(self._cls, self._to_exec.union(*[qs._to_exec for qs in other_qs], all=all))
+        return self._chain(self._to_exec.union(*[qs._to_exec for qs in other_qs], all=all))
 
     def intersection(self, *other_qs: "AsyncQuerySet[T]"):
-        return self.__class__(self._cls, self._to_exec.intersection(*[qs._to_exec for qs in other_qs]))
+        return self._chain(self._to_exec.intersection(*[qs._to_exec for qs in other_qs]))
 
     def difference(self, *other_qs: "AsyncQuerySet[T]"):
-        return self.__class__(self._cls, self._to_exec.difference(*[qs._to_exec for qs in other_qs]))
+        return self._chain(self._to_exec.difference(*[qs._to_exec for qs in other_qs]))
 
     def select_related(self, *fields):
-        return self.__class__(self._cls, self._to_exec.select_related(*fields))
+        return self._chain(self._to_exec.select_related(*fields))
 
     def prefetch_related(self, *lookups):
-        return self.__class__(self._cls, self._to_exec.prefetch_related(*lookups))
+        return self._chain(self._to_exec.prefetch_related(*lookups))
 
     def extra(self, select=None, where=None, params=None, tables=None, order_by=None, select_params=None):
-        return self.__class__(self._cls, self._to_exec.extra(select=select, where=where, params=params, tables=tables, order_by=order_by, select_params=select_params))
+        return self._chain(self._to_exec.extra(select=select, where=where, params=params, tables=tables, order_by=order_by, select_params=select_params))
 
     def defer(self, *fields):
-        return self.__class__(self._cls, self._to_exec.defer(*fields))
+        return self._chain(self._to_exec.defer(*fields))
 
     def only(self, *fields):
-        return self.__class__(self._cls, self._to_exec.only(*fields))
+        return self._chain(self._to_exec.only(*fields))
 
     def using(self, alias):
-        return self.__class__(self._cls, self._to_exec.using(alias))
+        return self._chain(self._to_exec.using(alias))
 
     def select_for_update(self, nowait=False, skip_locked=False, of=(), no_key=False):
-        return self.__class__(self._cls, self._to_exec.select_for_update(nowait=nowait, skip_locked=skip_locked, of=of, no_key=no_key))
+        return self._chain(self._to_exec.select_for_update(nowait=nowait, skip_locked=skip_locked, of=of, no_key=no_key))
+
+    def single_flight(self, enabled: bool = True):
+        return self._chain(self._to_exec, single_flight=enabled)
+
+    def fan_out(self, aliases: Iterable[str]) -> "AsyncFanOut[T]":
+        return AsyncFanOut(self, aliases)
+
+    def timeout(self, seconds: Optional[float]):
+        return self._chain(self._to_exec, timeout=seconds)
+
+    def cached(self, ttl: Optional[float] = None, enabled: bool = True):
+        return self._chain(self._to_exec, cached=enabled, cache_ttl=ttl)
 
     def raw(self, raw_query, params=(), translations=None, using=None):
-        return self.__class__(self._cls, self._to_exec.raw(raw_query, params=params, translations=translations, using=using))
+        return self._chain(self._to_exec.raw(raw_query, params=params, translations=translations, using=using))
 
     # METHODS THAT DOES NOT RETURN QUERYSETS
 
-    @sync_to_async
-    def get(self, **kwargs):
+    async def get(self, **kwargs):
+        identities = identity.get_identity_map()
+        if identities is None:
+            return await self._get(**kwargs)
+        using, queryset = self._get_db(), self._get_queryset()
+        pk = identity.get_pk(queryset, kwargs)
+        if pk is not identity.MISSING:
+            instance = identities.get(self._cls, using, pk)
+            if instance is not None:
+                return instance
+        instance = await self._get(**kwargs)
+        return identities.add(instance, using) if identity.is_full(queryset) else instance
+
+    @queryset_sync_to_async(read=True)
+    def _get(self, **kwargs):
         return self._to_exec.get(**kwargs)
 
-    @sync_to_async
+    @queryset_sync_to_async(for_write=True)
     def create(self, **kwargs):
         return self._to_exec.create(**kwargs)
 
-    @sync_to_async
+    @queryset_sync_to_async(for_write=True)
     def get_or_create(self, **kwargs):
         return self._to_exec.get_or_create(**kwargs)
 
-    @sync_to_async
+    @queryset_sync_to_async(for_write=True)
     def update_or_create(self, defaults=None, **kwargs):
         return self._to_exec.update_or_create(defaults=defaults, **kwargs)
 
-    @sync_to_async
+    @queryset_sync_to_async(for_write=True)
     def bulk_create(self, objs, batch_size=None, ignore_conflicts=False):
-        return self._to_exec.bulk_create(objs, batch_size=batch_size, ignore_conflicts=ignore_conflicts)
-
-    @sync_to_async
+        try:
+            return self._to_exec.bulk_create(objs, batch_size=batch_size, ignore_conflicts=ignore_conflicts)
+        finally:
+            cache.invalidate_model(self._cls)
+
+    async def bulk_create_stream(self, objs: Union[AsyncIterable[T], Iterable[T]], batch_size: int = 1000, ignore_conflicts: bool = False, max_in_flight: int = 2) -> int:
+        if batch_size <= 0:
+            raise ValueError("Batch size must be strictly positive.")
+        if max_in_flight <= 0:
+            raise ValueError("Max in flight must be strictly positive.")
+        # NOTE: BATCHES ARE INSERTED WHILE THE NEXT ONES ARE PRODUCED, UP TO `max_in_flight`
+        #       BATCHES ARE PENDING BEFORE THE PRODUCER IS AWAITED AGAIN (BACKPRESSURE).
+        in_flight = deque()
+        batch, created = [], 0
+        try:
+            async for obj in _aiterate(objs):
+                batch.append(obj)
+                if len(batch) < batch_size:
+                    continue
+                while in_flight and (len(in_flight) >= max_in_flight or in_flight[0].done()):
+                    created += len(await in_flight.popleft())
+                in_flight.append(asyncio.ensure_future(self.bulk_create(batch, ignore_conflicts=ignore_conflicts)))
+                batch = []
+            if batch:
+                in_flight.append(asyncio.ensure_future(self.bulk_create(batch, ignore_conflicts=ignore_conflicts)))
+            while in_flight:
+                created += len(await in_flight.popleft())
+        finally:
+            # CAUTION: batches already sent are awaited (not cancelled), so that a failed stream leaves complete batches
+            await asyncio.gather(*in_flight, return_exceptions=True)
+        return created
+
+    @queryset_sync_to_async(for_write=True)
     def bulk_update(self, objs, fields, batch_size=None):
-        return self._to_exec.bulk_update(objs, fields, batch_size=batch_size)
-
-    @sync_to_async
-    def count(self):
+        try:
+            return self._to_exec.bulk_update(objs, fields, batch_size=batch_size)
+        finally:
+            cache.invalidate_model(self._cls)
+
+    async def count(self):
+        if self._result_cache is not None:
+            return len(self._result_cache)
+        return await self._count()
+
+    @queryset_sync_to_async(read=True)
+    def _count(self):
         return self._to_exec.count()
 
-    @sync_to_async
-    def in_bulk(self, id_list=None, *, field_name='pk'):
+    async def in_bulk(self, id_list=None, *, field_name='pk'):
+        identities = identity.get_identity_map()
+        if identities is None:
+            return await self._in_bulk(id_list, field_name=field_name)
+        using, pks = self._get_db(), identity.get_pks(self._get_queryset(), id_list, field_name)
+        if pks is identity.MISSING:
+            return await self._in_bulk(id_list, field_name=field_name)
+        instances = {}
+        for pk in pks:
+            instance = identities.get(self._cls, using, pk)
+            if instance is not None:
+                instances[pk] = instance
+        missing = [value for pk, value in pks.items() if pk not in instances]
+        if missing:
+            for pk, instance in (await self._in_bulk(missing, field_name=field_name)).items():
+                instances[pk] = identities.add(instance, using)
+        return instances
+
+    @queryset_sync_to_async(read=True)
+    def _in_bulk(self, id_list=None, *, field_name='pk'):
         return self._to_exec.in_bulk(id_list=id_list, field_name=field_name)
 
-    @sync_to_async
-    def iterator(self, chunk_size=2000):
-        return self._to_exec.iterator(chunk_size=chunk_size)
-
-    @sync_to_async
+    async def paginate(self, *order_by: str, after: Optional[str] = None, limit: int = 100) -> pagination.Page:
+        if limit <= 0:
+            raise ValueError("Limit must be strictly positive.")
+        queryset = self._get_queryset()
+        keyset = pagination.get_keyset(self._cls, order_by or queryset.query.order_by or self._cls._meta.ordering, queryset._iterable_class)
+        queryset = queryset.order_by(*pagination.get_ordering(keyset))
+        if after is not None:
+            queryset = queryset.filter(pagination.get_filter(keyset, pagination.decode_cursor(keyset, after)))
+        # NOTE: ONE EXTRA ROW TELLS IF THERE IS A NEXT PAGE.
+        items = await self._chain(queryset[:limit + 1]).eval()
+        if len(items) <= limit:
+            return pagination.Page(items, None)
+        items = items[:limit]
+        return pagination.Page(items, pagination.encode_cursor(keyset, pagination.get_values(keyset, items[-1])))
+
+    async def pages(self, *order_by: str, after: Optional[str] = None, limit: int = 100) -> AsyncIterator[pagination.Page]:
+        while True:
+            page = await self.paginate(*order_by, after=after, limit=limit)
+            yield page
+            if not page.has_next:
+                break
+            after = page.next_cursor
+
+    async def to_columns(self, *fields, dtypes: Optional[Dict[str, Any]] = None, chunk_size: int = 2000) -> Dict[str, Any]:
+        if chunk_size <= 0:
+            raise ValueError("Chunk size must be strictly positive.")
+        using = self._get_db()
+        queryset = self._get_queryset()
+        if fields or queryset._fields is None:
+            # NOTE: A `values()` QUERYSET KEEPS ITS COLUMNS (AND GROUPING) WITHOUT FIELDS.
+            queryset = queryset.values_list(*fields)
+        columns = await self._timed(database_sync_to_async(fetch_columns, using)(queryset, using, dtypes, chunk_size))
+        return {name: columns[name] for name in fields} if fields else columns
+
+    async def iterator(self, chunk_size=2000):
+        async for chunk in self.achunks(chunk_size=chunk_size):
+            for item in chunk:
+                yield item
+
+    @queryset_sync_to_async()
     def latest(self, *fields):
         return self._to_exec.latest(*fields)
 
-    @sync_to_async
+    @queryset_sync_to_async()
     def earliest(self, *fields):
         return self._to_exec.earliest(*fields)
 
-    @sync_to_async
+    @queryset_sync_to_async(read=True)
     def first(self):
         return self._to_exec.first()
 
-    @sync_to_async
+    @queryset_sync_to_async()
     def last(self):
         return self._to_exec.last()
 
-    @sync_to_async
+    @queryset_sync_to_async(read=True)
     def aggregate(self, *args, **kwargs):
         return self._to_exec.aggregate(*args, **kwargs)
 
-    @sync_to_async
-    def exists(self):
-        return self._to_exec.exists()
-
-    @sync_to_async
-    def update(self, **kwargs):
-        return self._to_exec.update(**kwargs)
+    async def exists(self):
+        if self._result_cache is not None:
+            return bool(self._result_cache)
+        return await self._exists()
 
-    @sync_to_async
-    def delete(self):
-        return self._to_exec.delete()
+    @queryset_sync_to_async(read=True)
+    def _exists(self):
+        return self._to_exec.exists()
 
-    @sync_to_async
+    async def update(self, **kwargs):
+        self._result_cache = None
+        using = self._get_db(for_write=True)
+        try:
+            return await self._timed(database_sync_to_async(self._update, using)(**kwargs))
+        finally:
+            self._discard_identities(using, [self._cls])
+
+    def _update(self, **kwargs):
+        # NOTE: BULK WRITES DON'T SEND MODEL SIGNALS, THE CACHE IS INVALIDATED EXPLICITLY.
+        try:
+            return self._to_exec.update(**kwargs)
+        finally:
+            cache.invalidate_model(self._cls)
+
+    async def delete(self):
+        self._result_cache = None
+        using = self._get_db(for_write=True)
+        try:
+            deleted = await self._timed(database_sync_to_async(self._to_exec.delete, using)())
+        finally:
+            self._discard_identities(using, [self._cls])
+        # NOTE: CASCADED DELETES OF RELATED MODELS ARE COUNTED PER MODEL LABEL.
+        self._discard_identities(using, [apps.get_model(label) for label, count in deleted[1].items() if count])
+        return deleted
+
+    @staticmethod
+    def _discard_identities(using: str, model_classes: List[Type[models.Model]]) -> None:
+        identities = identity.get_identity_map()
+        if identities is not None:
+            for model in model_classes:
+                identities.discard_model(model, using)
+
+    @queryset_sync_to_async()
     def explain(self, format=None, **options):
         return self._to_exec.explain(format=format, **options)
 
 
 class AsyncManyToOneRelatedQuerySet(AsyncQuerySet[T]):
 
-    @sync_to_async
+    @queryset_sync_to_async(for_write=True)
     def add(self, *objs, bulk=True) -> None:
-        return self._to_exec.add(*objs, bulk=bulk)
+        self._result_cache = None
+        try:
+            return self._to_exec.add(*objs, bulk=bulk)
+        finally:
+            cache.invalidate_model(self._cls)
 
-    @sync_to_async
+    @queryset_sync_to_async(for_write=True)
     def remove(self, *objs, bulk=True) -> None:
-        return self._to_exec.remove(*objs, bulk=bulk)
+        self._result_cache = None
+        try:
+            return self._to_exec.remove(*objs, bulk=bulk)
+        finally:
+            cache.invalidate_model(self._cls)
 
-    @sync_to_async
+    @queryset_sync_to_async(for_write=True)
     def clear(self, *, bulk=True) -> None:
-        return self._to_exec.clear(bulk=bulk)
+        self._result_cache = None
+        try:
+            return self._to_exec.clear(bulk=bulk)
+        finally:
+            cache.invalidate_model(self._cls)
 
-    @sync_to_async
+    @queryset_sync_to_async(for_write=True)
     def set(self, objs, *, bulk=True, clear=False) -> None:
-        return self._to_exec.set(objs, bulk=bulk, clear=clear)
+        self._result_cache = None
+        try:
+            return self._to_exec.set(objs, bulk=bulk, clear=clear)
+        finally:
+            cache.invalidate_model(self._cls)
 
 
 class AsyncManyToManyRelatedQuerySet(AsyncQuerySet[T]):
 
-    @sync_to_async
+    @queryset_sync_to_async(for_write=True)
     def add(self, *objs, through_defaults=None) -> None:
+        self._result_cache = None
         return self._to_exec.add(*objs, through_defaults=through_defaults)
 
-    @sync_to_async
+    @queryset_sync_to_async(for_write=True)
     def create(self, *, through_defaults=None, **kwargs) -> T:
+        self._result_cache = None
         return self._to_exec.create(through_defaults=through_defaults, **kwargs)
 
-    @sync_to_async
+    @queryset_sync_to_async(for_write=True)
     def get_or_create(self, *, through_defaults=None, **kwargs) -> T:
+        self._result_cache = None
         return self._to_exec.get_or_create(through_defaults=through_defaults, **kwargs)
 
-    @sync_to_async
+    @queryset_sync_to_async(for_write=True)
     def update_or_create(self, *, through_defaults=None, **kwargs) -> T:
+        self._result_cache = None
         return self._to_exec.update_or_create(through_defaults=through_defaults, **kwargs)
 
-    @sync_to_async
+    @queryset_sync_to_async(for_write=True)
     def remove(self, *objs) -> None:
+        self._result_cache = None
         return self._to_exec.remove(*objs)
 
-    @sync_to_async
+    @queryset_sync_to_async(for_write=True)
     def clear(self) -> None:
+        self._result_cache = None
         return self._to_exec.clear()
 
-    @sync_to_async
+    @queryset_sync_to_async(for_write=True)
     def set(self, objs, *, clear=False, through_defaults=None) -> None:
+        self._result_cache = None
         return self._to_exec.set(objs, clear=clear, through_defaults=through_defaults)
 
 
+class AsyncFanOut(Generic[T]):
+
+    def __init__(self, queryset: AsyncQuerySet[T], aliases: Iterable[str]) -> None:
+        self._queryset = queryset
+        self.aliases = tuple(aliases)
+
+    def __repr__(self):
+        return f"<AsyncFanOut {self.aliases} [...{self._queryset._cls}]>"
+
+    async def __aiter__(self):
+        # NOTE: CHUNKS ARE YIELDED AS SOON AS ANY ALIAS RETURNS THEM, IN NO PARTICULAR ORDER.
+        queue = asyncio.Queue(maxsize=len(self.aliases))
+        done = object()
+
+        async def produce(alias):
+            try:
+                async for chunk in self._queryset.using(alias).achunks():
+                    await queue.put(chunk)
+            except Exception as e:
+                await queue.put(e)
+            else:
+                await queue.put(done)
+
+        tasks = [asyncio.ensure_future(produce(alias)) for alias in self.aliases]
+        try:
+            remaining = len(tasks)
+            while remaining:
+                chunk = await queue.get()
+                if chunk is done:
+                    remaining -= 1
+                elif isinstance(chunk, Exception):
+                    raise chunk
+                else:
+                    for item in chunk:
+                        yield item
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def results(self, method: str = "eval", *args, **kwargs) -> Dict[str, Any]:
+        results = await asyncio.gather(*[getattr(self._queryset.using(alias), method)(*args, **kwargs) for alias in self.aliases])
+        return dict(zip(self.aliases, results))
+
+    async def eval(self) -> List[Any]:
+        return [item for result in (await self.results("eval")).values() for item in result]
+
+    async def count(self) -> int:
+        return sum((await self.results("count")).values())
+
+    async def exists(self) -> bool:
+        return any((await self.results("exists")).values())
+
+
+async def _aiterate(objs: Union[AsyncIterable[Any], Iterable[Any]]) -> AsyncIterator[Any]:
+    if hasattr(objs, "__aiter__"):
+        async for obj in objs:
+            yield obj
+    else:
+        for obj in objs:
+            yield obj
+
+
+async def aprefetch(instances: Iterable[T], *lookups) -> List[T]:
+    instances = list(instances)
+    if instances:
+        using = instances[0]._state.db or router.db_for_read(instances[0].__class__)
+        await database_sync_to_async(prefetch_related_objects, using)(instances, *lookups)
+    return instances
+
+
+async def agather(*aws: Union[Awaitable[Any], AsyncQuerySet], return_exceptions: bool = False) -> List[Any]:
+    # NOTE: THE AWAITABLES ARE STARTED IN A BATCH CONTEXT, DATABASE CALLS THEY
+    #       REQUEST WITHIN THE SAME LOOP ITERATION SHARE ONE THREAD HOP PER ALIAS.
+    with batch_calls():
+        futures = [asyncio.ensure_future(aw.eval() if isinstance(aw, AsyncQuerySet) else aw) for aw in aws]
+    return await asyncio.gather(*futures, return_exceptions=return_exceptions)
+
+
 AsyncManager = AsyncQuerySet
 AsyncManyToOneRelatedManager = AsyncManyToOneRelatedQuerySet
 AsyncManyToManyRelatedManager = AsyncManyToManyRelatedQuerySet
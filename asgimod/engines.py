@@ -0,0 +1,186 @@
+import asyncio
+import re
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional, Sequence
+from weakref import WeakKeyDictionary
+
+from django.core.exceptions import EmptyResultSet, ImproperlyConfigured
+from django.db import connections
+from django.db.models.query import QuerySet
+from django.db.models.sql.query import Query
+from django.utils.module_loading import import_string
+
+from . import slow_queries
+from .conf import get_setting
+from .interrupts import Statement
+
+try:
+    import aiosqlite
+except ImportError:
+    aiosqlite = None
+
+try:
+    from django.db.backends.sqlite3._functions import register as register_sqlite_functions
+except ImportError: # django<4.1
+    register_sqlite_functions = None
+
+
+_drivers: "WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, AsyncDriver]]" = WeakKeyDictionary()
+
+
+class AsyncDriver:
+
+    def __init__(self, using: str) -> None:
+        self.using = using
+        self.settings_dict = connections[using].settings_dict
+
+    async def connect(self) -> None:
+        raise NotImplementedError("subclasses of 'AsyncDriver' must provide a `connect()` method")
+
+    async def fetchall(self, sql: str, params: Sequence[Any]) -> List[Sequence[Any]]:
+        raise NotImplementedError("subclasses of 'AsyncDriver' must provide a `fetchall()` method")
+
+    async def close(self) -> None:
+        raise NotImplementedError("subclasses of 'AsyncDriver' must provide a `close()` method")
+
+
+class SQLiteConnection(sqlite3.Connection):
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        # NOTE: SAME SETUP AS DJANGO SQLITE CONNECTIONS, SO COMPILED SQL
+        #       USING DJANGO SQLITE FUNCTIONS CAN BE EXECUTED.
+        if register_sqlite_functions is not None:
+            register_sqlite_functions(self)
+        self.execute("PRAGMA foreign_keys = ON")
+
+
+class SQLiteDriver(AsyncDriver):
+
+    FORMAT_QMARK_REGEX = re.compile(r"(?<!%)%s")
+
+    def __init__(self, using: str) -> None:
+        super().__init__(using)
+        self._connection = None
+        self._lock = asyncio.Lock()
+        self._statement_lock = asyncio.Lock()
+
+    async def connect(self) -> None:
+        if aiosqlite is None:
+            raise ImproperlyConfigured("'SQLiteDriver' requires the 'aiosqlite' package to be installed")
+        async with self._lock:
+            if self._connection is not None:
+                return
+            params = connections[self.using].get_connection_params()
+            params.setdefault("factory", SQLiteConnection)
+            self._connection = await aiosqlite.connect(params.pop("database"), isolation_level=None, **params)
+
+    async def fetchall(self, sql: str, params: Sequence[Any]) -> List[Sequence[Any]]:
+        if self._connection is None:
+            await self.connect()
+        sql = self.FORMAT_QMARK_REGEX.sub("?", sql).replace("%%", "%")
+        # CAUTION: the lock guarantees the connection is not running the statement of another call when interrupted
+        async with self._statement_lock:
+            try:
+                return await self._connection.execute_fetchall(sql, params)
+            except asyncio.CancelledError:
+                # NOTE: THE STATEMENT KEEPS RUNNING ON THE THREAD OF THE CONNECTION UNLESS INTERRUPTED.
+                await self._connection.interrupt()
+                raise
+
+    async def close(self) -> None:
+        if self._connection is not None:
+            connection, self._connection = self._connection, None
+            await connection.close()
+
+
+class FetchedCompiler:
+    # NOTE: HANDS THE ROWS FETCHED BY THE DRIVER TO THE DJANGO ITERABLE OF THE QUERYSET,
+    #       THROUGH THE COMPILER THAT COMPILED THEM, WHICH WON'T TOUCH THE DATABASE.
+
+    def __init__(self, compiler: Any, rows: List[Sequence[Any]]) -> None:
+        self.compiler = compiler
+        self.rows = rows
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.compiler, name)
+
+    def execute_sql(self, *args, **kwargs) -> List[List[Sequence[Any]]]:
+        return [self.rows]
+
+    def results_iter(self, results: Any = None, tuple_expected: bool = False, **kwargs) -> Any:
+        return self.compiler.results_iter([self.rows] if results is None else results, tuple_expected=tuple_expected)
+
+
+class FetchedQuery(Query):
+    fetched_compiler: Optional[FetchedCompiler] = None
+
+    def get_compiler(self, *args, **kwargs) -> Any:
+        return self.fetched_compiler
+
+
+def get_driver(using: str) -> Optional[AsyncDriver]:
+    path = get_setting("DRIVERS").get(using)
+    if path is None:
+        return None
+    loop_drivers = _drivers.setdefault(asyncio.get_running_loop(), {})
+    try:
+        return loop_drivers[using]
+    except KeyError:
+        pass
+    driver = loop_drivers[using] = import_string(path)(using)
+    return driver
+
+
+async def close_drivers() -> None:
+    loop_drivers = _drivers.pop(asyncio.get_running_loop(), {})
+    for driver in loop_drivers.values():
+        await driver.close()
+
+
+class DriversMiddleware:
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "lifespan":
+            return await self.app(scope, receive, send)
+        # NOTE: THE DJANGO ASGI HANDLER DOES NOT SUPPORT THE LIFESPAN PROTOCOL, IT IS HANDLED HERE.
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                # CAUTION: the driver threads are not daemon threads, they would keep the process alive
+                await close_drivers()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+def can_execute(queryset: Any) -> bool:
+    return (
+        isinstance(queryset, QuerySet)
+        and not queryset._prefetch_related_lookups
+        and not queryset.query.select_for_update
+    )
+
+
+async def execute(statement: Statement, queryset: QuerySet, using: str, driver: AsyncDriver) -> List[Any]:
+    compiler = queryset.query.get_compiler(using=using)
+    try:
+        sql, params = compiler.as_sql()
+    except EmptyResultSet:
+        return []
+    start = time.perf_counter()
+    rows = await driver.fetchall(sql, params)
+    duration = time.perf_counter() - start
+    if statement.threshold is not None and duration >= statement.threshold:
+        statement.slow_queries.append(slow_queries.SlowQuery(sql, params, using, duration, False))
+    query = queryset.query.chain(FetchedQuery)
+    query.fetched_compiler = FetchedCompiler(compiler, rows)
+    iterable_class = queryset._iterable_class
+    queryset = queryset._chain()
+    queryset.query = query
+    return list(iterable_class(queryset))
@@ -0,0 +1,225 @@
+import asyncio
+from concurrent.futures.thread import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial, wraps
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, TypeVar, Awaitable
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.base.base import BaseDatabaseWrapper
+
+from .conf import get_setting, get_alias_setting
+from .interrupts import interruptible
+from .sync import sync_to_async
+
+
+R = TypeVar("R")
+
+EXECUTOR_THREAD_SENSITIVE = "thread_sensitive"
+EXECUTOR_POOL = "pool"
+
+_pools: Dict[str, ThreadPoolExecutor] = {}
+_pinned_pools: Dict[str, List[ThreadPoolExecutor]] = {}
+_pool_connections: Set[BaseDatabaseWrapper] = set()
+_lock = Lock()
+_thread_sensitive: ContextVar[bool] = ContextVar("asgimod_thread_sensitive", default=False)
+_call_batcher: ContextVar[Optional["CallBatcher"]] = ContextVar("asgimod_call_batcher", default=None)
+_pinned_executors: ContextVar[Dict[str, Optional[ThreadPoolExecutor]]] = ContextVar("asgimod_pinned_executors", default={})
+
+
+class CallBatcher:
+
+    def __init__(self) -> None:
+        self._pending: Dict[str, List[Tuple[Callable[..., Any], tuple, dict, asyncio.Future]]] = {}
+        self._scheduled = False
+        self._tasks = set()
+
+    def call(self, func: Callable[..., R], using: str, *args, **kwargs) -> "asyncio.Future[R]":
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault(using, []).append((func, args, kwargs, future))
+        if not self._scheduled:
+            # NOTE: CALLS REQUESTED WITHIN THE SAME LOOP ITERATION ARE DISPATCHED TOGETHER.
+            self._scheduled = True
+            loop.call_soon(self._dispatch)
+        return future
+
+    def _dispatch(self) -> None:
+        self._scheduled = False
+        pending, self._pending = self._pending, {}
+        for using, calls in pending.items():
+            task = asyncio.ensure_future(self._run_calls(using, calls))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_calls(self, using: str, calls: list) -> None:
+        try:
+            results = await _database_sync_to_async(self._call_all, using)([(func, args, kwargs) for func, args, kwargs, _ in calls])
+        except asyncio.CancelledError:
+            for _, _, _, future in calls:
+                future.cancel()
+            raise
+        except Exception as e:
+            for _, _, _, future in calls:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, _, _, future), (exception, result) in zip(calls, results):
+            if future.done():
+                continue
+            if exception is not None:
+                future.set_exception(exception)
+            else:
+                future.set_result(result)
+
+    @staticmethod
+    def _call_all(calls: list) -> List[Tuple[Optional[BaseException], Any]]:
+        # CAUTION: calls run sequentially on the same connection, an error only fails its own caller
+        results = []
+        for func, args, kwargs in calls:
+            try:
+                results.append((None, func(*args, **kwargs)))
+            except Exception as e:
+                results.append((e, None))
+        return results
+
+
+def get_executor(using: str = DEFAULT_DB_ALIAS) -> Optional[ThreadPoolExecutor]:
+    mode = get_setting("EXECUTOR")
+    if mode == EXECUTOR_THREAD_SENSITIVE or _thread_sensitive.get():
+        return None
+    if mode != EXECUTOR_POOL:
+        raise ImproperlyConfigured("ASGIMOD['EXECUTOR'] must be one of %r, got %r" % ((EXECUTOR_THREAD_SENSITIVE, EXECUTOR_POOL), mode))
+    try:
+        return _pools[using]
+    except KeyError:
+        pass
+    with _lock:
+        if using not in _pools:
+            _pools[using] = ThreadPoolExecutor(max_workers=get_alias_setting("POOL_SIZE", using), thread_name_prefix=f"asgimod-{using}")
+        return _pools[using]
+
+
+def acquire_pinned_executor(using: str = DEFAULT_DB_ALIAS, dedicated: bool = False) -> Optional[ThreadPoolExecutor]:
+    # NOTE: SOME WORK (E.G. SERVER-SIDE CURSORS) MUST STAY ON THE SAME
+    #       CONNECTION ACROSS CALLS, A POOL CANNOT GUARANTEE THAT.
+    #       DEDICATED EXECUTORS ARE ALSO ACQUIRED WITH THE THREAD SENSITIVE EXECUTOR.
+    if not dedicated and get_executor(using) is None:
+        return None
+    with _lock:
+        pinned_pool = _pinned_pools.setdefault(using, [])
+        if pinned_pool:
+            return pinned_pool.pop()
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"asgimod-{using}-pinned")
+
+
+def release_pinned_executor(executor: Optional[ThreadPoolExecutor], using: str = DEFAULT_DB_ALIAS) -> None:
+    if executor is None:
+        return
+    with _lock:
+        pinned_pool = _pinned_pools.setdefault(using, [])
+        if len(pinned_pool) < get_alias_setting("POOL_SIZE", using):
+            # NOTE: THE CONNECTION IS CHECKED ONCE THE EXECUTOR IS NO LONGER PINNED, NOT BETWEEN ITS CALLS.
+            executor.submit(_close_if_unusable_or_obsolete, using)
+            pinned_pool.append(executor)
+            return
+    executor.submit(lambda: connections[using].close())
+    executor.shutdown(wait=False)
+
+
+def close_executors() -> None:
+    with _lock:
+        executors = list(_pools.values())
+        executors.extend(executor for pinned_pool in _pinned_pools.values() for executor in pinned_pool)
+        _pools.clear()
+        _pinned_pools.clear()
+    for executor in executors:
+        executor.shutdown(wait=True)
+    with _lock:
+        pool_connections = list(_pool_connections)
+        _pool_connections.clear()
+    for connection in pool_connections:
+        # CAUTION: the worker threads that own these connections are already shut down
+        connection.inc_thread_sharing()
+        try:
+            connection.close()
+        finally:
+            connection.dec_thread_sharing()
+
+
+@contextmanager
+def batch_calls():
+    token = _call_batcher.set(CallBatcher())
+    try:
+        yield
+    finally:
+        _call_batcher.reset(token)
+
+
+def is_pinned(using: str = DEFAULT_DB_ALIAS) -> bool:
+    return using in _pinned_executors.get()
+
+
+@contextmanager
+def pin_executor(executor: Optional[ThreadPoolExecutor], using: str = DEFAULT_DB_ALIAS):
+    # NOTE: `None` PINS THE CALLS TO THE THREAD SENSITIVE EXECUTOR.
+    token = _pinned_executors.set({**_pinned_executors.get(), using: executor})
+    try:
+        yield
+    finally:
+        _pinned_executors.reset(token)
+
+
+@contextmanager
+def thread_sensitive():
+    token = _thread_sensitive.set(True)
+    try:
+        yield
+    finally:
+        _thread_sensitive.reset(token)
+
+
+def _close_if_unusable_or_obsolete(using: str) -> None:
+    connection = connections[using]
+    if not connection.in_atomic_block:
+        connection.close_if_unusable_or_obsolete()
+
+
+def _pooled(func: Callable[..., R], using: str, pinned: bool = False) -> Callable[..., R]:
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        # CAUTION: pinned executors hold open cursors and transactions between calls, their connection must not be closed
+        if not pinned:
+            _close_if_unusable_or_obsolete(using)
+        connection = connections[using]
+        if connection not in _pool_connections:
+            with _lock:
+                _pool_connections.add(connection)
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+def database_sync_to_async(func: Callable[..., R], using: str = DEFAULT_DB_ALIAS, executor: Optional[ThreadPoolExecutor] = None) -> Callable[..., Awaitable[R]]:
+    batcher = _call_batcher.get()
+    # CAUTION: calls pinned to a transaction executor must never join a batch run on another thread
+    if batcher is not None and executor is None and not is_pinned(using):
+        return partial(batcher.call, func, using)
+    return _database_sync_to_async(func, using, executor)
+
+
+def _database_sync_to_async(func: Callable[..., R], using: str = DEFAULT_DB_ALIAS, executor: Optional[ThreadPoolExecutor] = None) -> Callable[..., Awaitable[R]]:
+    # NOTE: EXPLICIT EXECUTORS ARE PINNED EXECUTORS (E.G. OF STREAMS).
+    pinned = executor is not None
+    if executor is None:
+        pinned_executors = _pinned_executors.get()
+        pinned = using in pinned_executors
+        executor = pinned_executors[using] if pinned else get_executor(using)
+    if executor is None:
+        call = interruptible(func, using, sync_to_async)
+    else:
+        call = interruptible(_pooled(func, using, pinned), using, partial(sync_to_async, thread_sensitive=False, executor=executor))
+    return call
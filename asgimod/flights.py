@@ -0,0 +1,37 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+from weakref import WeakKeyDictionary
+
+from django.db.models.query import QuerySet
+
+from .cache import copy_result
+
+
+R = TypeVar("R")
+
+_flights: "WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Hashable, asyncio.Future]]" = WeakKeyDictionary()
+
+
+def query_key(queryset: Any, using: str, method: str, args: Tuple = (), kwargs: Optional[Dict[str, Any]] = None) -> Optional[Hashable]:
+    # NOTE: QUERIES THAT CANNOT BE COMPILED ON THE EVENT LOOP ARE NOT COALESCED.
+    if not isinstance(queryset, QuerySet):
+        return None
+    try:
+        sql, params = queryset.query.get_compiler(using=using).as_sql()
+        key = (method, using, sql, tuple(params), repr(args), repr(sorted((kwargs or {}).items())))
+        hash(key)
+    except Exception:
+        return None
+    return key
+
+
+async def single_flight(key: Hashable, call: Callable[[], Awaitable[R]]) -> R:
+    flights = _flights.setdefault(asyncio.get_running_loop(), {})
+    try:
+        future = flights[key]
+    except KeyError:
+        future = flights[key] = asyncio.ensure_future(call())
+        future.add_done_callback(lambda _: flights.pop(key, None))
+        return await asyncio.shield(future)
+    # CAUTION: followers get a copy of the result, model instances (also of lists and dicts) must not be shared between callers
+    return copy_result(await asyncio.shield(future))
@@ -0,0 +1,160 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Dict, Iterable, Optional, Tuple, Type, TypeVar
+
+from django.core.exceptions import ValidationError
+from django.db import DEFAULT_DB_ALIAS, models, router
+from django.db.models.fields.related_descriptors import ForwardManyToOneDescriptor
+from django.db.models.query import ModelIterable, QuerySet
+
+from .executors import database_sync_to_async
+from .loaders import load_related as load_batched_related
+from .routers import get_primary_alias
+
+
+T = TypeVar("T", bound=models.Model)
+
+MISSING = object()
+_identity_map: ContextVar[Optional["IdentityMap"]] = ContextVar("asgimod_identity_map", default=None)
+
+
+class IdentityMap:
+
+    def __init__(self) -> None:
+        self._instances: Dict[Tuple[Type[models.Model], Optional[str], Any], models.Model] = {}
+
+    @staticmethod
+    def _get_key(model: Type[models.Model], using: Optional[str], pk: Any) -> Tuple[Type[models.Model], Optional[str], Any]:
+        # NOTE: REPLICAS SHARE THE INSTANCES OF THEIR PRIMARY.
+        return (model, get_primary_alias(using), pk)
+
+    def get(self, model: Type[T], using: Optional[str], pk: Any) -> Optional[T]:
+        return self._instances.get(self._get_key(model, using, pk))
+
+    def add(self, instance: T, using: Optional[str] = None, replace: bool = False) -> T:
+        if instance.pk is None:
+            return instance
+        key = self._get_key(instance.__class__, using or instance._state.db, instance.pk)
+        if replace:
+            self._instances[key] = instance
+            return instance
+        return self._instances.setdefault(key, instance)
+
+    def discard(self, instance: models.Model, using: Optional[str] = None) -> None:
+        self._instances.pop(self._get_key(instance.__class__, using or instance._state.db, instance.pk), None)
+
+    def discard_model(self, model: Type[models.Model], using: Optional[str] = None) -> None:
+        # NOTE: PARENTS, CHILDREN AND PROXIES SHARE THE ROWS OF THE MODEL.
+        using = get_primary_alias(using)
+        for key in [key for key in self._instances if key[1] == using and (issubclass(key[0], model) or issubclass(model, key[0]))]:
+            del self._instances[key]
+
+    def clear(self) -> None:
+        self._instances.clear()
+
+    def __len__(self) -> int:
+        return len(self._instances)
+
+
+class IdentityMapMiddleware:
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        # CAUTION: websockets are long lived, their instances would never be refreshed
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        with identity_map():
+            return await self.app(scope, receive, send)
+
+
+@contextmanager
+def identity_map():
+    token = _identity_map.set(IdentityMap())
+    try:
+        yield _identity_map.get()
+    finally:
+        _identity_map.reset(token)
+
+
+def get_identity_map() -> Optional[IdentityMap]:
+    return _identity_map.get()
+
+
+def is_full(queryset: QuerySet) -> bool:
+    # NOTE: ONLY FULL INSTANCES, WITHOUT DEFERRED FIELDS OR PRELOADED RELATIONS, ARE SHARED.
+    query = queryset.query
+    return (
+        isinstance(queryset, QuerySet) and queryset._iterable_class is ModelIterable and not queryset._prefetch_related_lookups
+        and not query.select_related and not query.annotations and not query.extra and query.deferred_loading == (frozenset(), True)
+    )
+
+
+def is_plain(queryset: QuerySet) -> bool:
+    query = queryset.query
+    return (
+        is_full(queryset) and not query.where and not query.combinator and not query.select_for_update
+        and not query.low_mark and query.high_mark is None
+    )
+
+
+def to_pk(model: Type[models.Model], value: Any) -> Any:
+    if isinstance(value, models.Model):
+        value = value.pk
+    try:
+        return model._meta.pk.to_python(value)
+    except ValidationError:
+        return MISSING
+
+
+def get_pk(queryset: QuerySet, kwargs: Dict[str, Any]) -> Any:
+    if len(kwargs) != 1 or not is_plain(queryset):
+        return MISSING
+    (lookup, value), = kwargs.items()
+    pk = queryset.model._meta.pk
+    if lookup not in ("pk", "pk__exact", pk.name, f"{pk.name}__exact", pk.attname, f"{pk.attname}__exact"):
+        return MISSING
+    return to_pk(queryset.model, value)
+
+
+def get_pks(queryset: QuerySet, id_list: Optional[Iterable[Any]], field_name: str) -> Any:
+    if id_list is None or field_name not in ("pk", queryset.model._meta.pk.name) or not is_plain(queryset):
+        return MISSING
+    pks = {}
+    for value in id_list:
+        pk = to_pk(queryset.model, value)
+        if pk is MISSING:
+            return MISSING
+        pks[pk] = value
+    return pks
+
+
+def load_related(instance: models.Model, name: str) -> Optional[Awaitable[Optional[models.Model]]]:
+    identities = _identity_map.get()
+    if identities is None:
+        return None
+    descriptor = getattr(instance.__class__, name, None)
+    if not isinstance(descriptor, ForwardManyToOneDescriptor) or not descriptor.field.target_field.primary_key:
+        return None
+    return _load_forward(identities, instance, name, descriptor)
+
+
+async def _load_forward(identities: IdentityMap, instance: models.Model, name: str, descriptor: ForwardManyToOneDescriptor) -> Optional[models.Model]:
+    field = descriptor.field
+    if field.is_cached(instance):
+        return field.get_cached_value(instance)
+    value = getattr(instance, field.attname)
+    related_model = field.remote_field.model
+    using = router.db_for_read(related_model, instance=instance)
+    obj = identities.get(related_model, using, value) if value is not None else None
+    if obj is None:
+        related = load_batched_related(instance, name)
+        if related is None:
+            related = database_sync_to_async(getattr, instance._state.db or DEFAULT_DB_ALIAS)(instance, name)
+        obj = await related
+        if obj is None:
+            return obj
+        obj = identities.add(obj, using)
+    field.set_cached_value(instance, obj)
+    return obj
@@ -0,0 +1,223 @@
+import inspect
+import logging
+import sys
+from bisect import bisect_left
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from django.core.signals import setting_changed
+from django.db import models
+from django.db.models.query import QuerySet
+from django.utils.module_loading import import_string
+
+from .conf import get_setting
+
+
+logger = logging.getLogger("asgimod.instrumentation")
+
+_added_sinks: List["BaseSink"] = []
+_sinks: Optional[Tuple["BaseSink", ...]] = None
+_lock = Lock()
+
+
+class CallRecord:
+    __slots__ = ("method", "model", "using", "queue_wait", "exec_time", "total_time", "rows", "bytes", "error")
+
+    def __init__(self, method: str, model: Optional[str], using: str, queue_wait: float, exec_time: float, total_time: float, rows: Optional[int], bytes: Optional[int], error: Optional[BaseException] = None) -> None:
+        self.method = method
+        self.model = model
+        self.using = using
+        self.queue_wait = queue_wait
+        self.exec_time = exec_time
+        self.total_time = total_time
+        self.rows = rows
+        self.bytes = bytes
+        self.error = error
+
+    @property
+    def hop_time(self) -> float:
+        return max(self.total_time - self.queue_wait - self.exec_time, 0.0)
+
+    def __repr__(self) -> str:
+        return "CallRecord(%s)" % ", ".join("%s=%r" % (name, getattr(self, name)) for name in self.__slots__)
+
+
+class BaseSink:
+
+    def record(self, record: CallRecord) -> None:
+        raise NotImplementedError("subclasses of 'BaseSink' must provide a `record()` method")
+
+
+class CallbackSink(BaseSink):
+
+    def __init__(self, callback: Callable[[CallRecord], Any]) -> None:
+        self.callback = callback
+
+    def record(self, record: CallRecord) -> None:
+        self.callback(record)
+
+
+class LoggingSink(BaseSink):
+
+    def __init__(self, logger: str = "asgimod.calls", level: int = logging.DEBUG) -> None:
+        self.logger = logging.getLogger(logger)
+        self.level = level
+
+    def record(self, record: CallRecord) -> None:
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(
+                self.level,
+                "%s %s on %r: queue %.3fms, exec %.3fms, hop %.3fms, %s rows, %s bytes%s",
+                record.method, record.model, record.using, record.queue_wait * 1000, record.exec_time * 1000, record.hop_time * 1000,
+                record.rows, record.bytes, " (%r)" % record.error if record.error is not None else "",
+                extra={"asgimod_call": record},
+            )
+
+
+class PrometheusSink(BaseSink):
+
+    DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, prefix: str = "asgimod", buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.prefix = prefix
+        self.buckets = tuple(sorted(buckets))
+        self.counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+        self.histograms: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], List[float]] = {}
+        self._lock = Lock()
+
+    def record(self, record: CallRecord) -> None:
+        labels = (("method", record.method), ("model", record.model or ""), ("using", record.using))
+        status = "error" if record.error is not None else "ok"
+        with self._lock:
+            self._inc("calls_total", (*labels, ("status", status)), 1)
+            self._inc("rows_total", labels, record.rows or 0)
+            self._inc("bytes_total", labels, record.bytes or 0)
+            self._observe("queue_wait_seconds", labels, record.queue_wait)
+            self._observe("exec_seconds", labels, record.exec_time)
+            self._observe("call_seconds", labels, record.total_time)
+
+    def _inc(self, name: str, labels: tuple, value: float) -> None:
+        key = (name, labels)
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def _observe(self, name: str, labels: tuple, value: float) -> None:
+        # NOTE: BUCKET COUNTS ARE STORED NON CUMULATIVE, FOLLOWED BY +INF, SUM AND COUNT.
+        key = (name, labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = [0.0] * (len(self.buckets) + 3)
+        histogram[bisect_left(self.buckets, value)] += 1
+        histogram[-2] += value
+        histogram[-1] += 1
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for name in sorted({name for name, _ in self.counters}):
+                lines.append(f"# TYPE {self.prefix}_{name} counter")
+                for (counter, labels), value in sorted(self.counters.items()):
+                    if counter == name:
+                        lines.append(f"{self.prefix}_{name}{_format_labels(labels)} {value:g}")
+            for name in sorted({name for name, _ in self.histograms}):
+                lines.append(f"# TYPE {self.prefix}_{name} histogram")
+                for (histogram_name, labels), histogram in sorted(self.histograms.items()):
+                    if histogram_name != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip((*self.buckets, "+Inf"), histogram):
+                        cumulative += count
+                        lines.append(f"{self.prefix}_{name}_bucket{_format_labels((*labels, ('le', str(bound))))} {cumulative:g}")
+                    lines.append(f"{self.prefix}_{name}_sum{_format_labels(labels)} {histogram[-2]:g}")
+                    lines.append(f"{self.prefix}_{name}_count{_format_labels(labels)} {histogram[-1]:g}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: tuple) -> str:
+    return "{%s}" % ",".join('%s="%s"' % (key, str(value).replace("\\", "\\\\").replace('"', '\\"')) for key, value in labels)
+
+
+def get_sinks() -> Tuple[BaseSink, ...]:
+    global _sinks
+    sinks = _sinks
+    if sinks is None:
+        with _lock:
+            configured = [import_string(sink)() if isinstance(sink, str) else sink for sink in get_setting("SINKS")]
+            sinks = _sinks = (*configured, *_added_sinks)
+    return sinks
+
+
+def add_sink(sink: BaseSink) -> None:
+    global _sinks
+    with _lock:
+        _added_sinks.append(sink)
+        _sinks = None
+
+
+def remove_sink(sink: BaseSink) -> None:
+    global _sinks
+    with _lock:
+        _added_sinks.remove(sink)
+        _sinks = None
+
+
+def describe_call(func: Callable[..., Any], args: tuple) -> Tuple[str, Optional[str]]:
+    # NOTE: BEST EFFORT, THE TARGET IS THE BOUND INSTANCE OR THE FIRST ARGUMENT
+    #       (E.G. THE ASYNC QUERYSET OF DECORATED METHODS, OR THE QUERYSET OF `list`).
+    func = inspect.unwrap(func)
+    method = "eval" if func is list else getattr(func, "__name__", type(func).__name__).lstrip("_")
+    target = getattr(func, "__self__", None)
+    if target is None and args:
+        target = args[0]
+    if isinstance(target, models.Model):
+        model = target.__class__
+    else:
+        model = getattr(target, "_cls", None) or getattr(target, "model", None)
+    if isinstance(model, type) and issubclass(model, models.Model):
+        return method, model._meta.label
+    return method, None
+
+
+def estimate_size(result: Any, sample_size: int = 8) -> Tuple[Optional[int], Optional[int]]:
+    if result is None:
+        return 0, 0
+    if isinstance(result, (list, tuple)) and not hasattr(result, "_fields"):
+        if not result:
+            return 0, sys.getsizeof(result)
+        sample = result[:sample_size]
+        return len(result), sys.getsizeof(result) + sum(map(_sizeof, sample)) * len(result) // len(sample)
+    if isinstance(result, QuerySet) or hasattr(result, "__next__"):
+        return None, None
+    return 1, _sizeof(result)
+
+
+def _sizeof(obj: Any) -> int:
+    size = sys.getsizeof(obj)
+    values = getattr(obj, "__dict__", None)
+    if values is not None:
+        size += sys.getsizeof(values)
+        values = values.values()
+    elif isinstance(obj, dict):
+        values = obj.values()
+    elif isinstance(obj, tuple):
+        values = obj
+    else:
+        return size
+    return size + sum(sys.getsizeof(value) for value in values)
+
+
+def emit(record: CallRecord) -> None:
+    for sink in get_sinks():
+        try:
+            sink.record(record)
+        except Exception:
+            # CAUTION: a failing sink must never fail the database call
+            logger.exception("Sink %r failed to record %r", sink, record)
+
+
+def _reset(*, setting, **kwargs):
+    global _sinks
+    if setting == "ASGIMOD":
+        _sinks = None
+
+
+setting_changed.connect(_reset)
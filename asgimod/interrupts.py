@@ -0,0 +1,135 @@
+import asyncio
+import time
+from functools import partial, wraps
+from threading import Lock
+from typing import Any, Awaitable, Callable, List, Optional, TypeVar
+
+from django.db import connections
+from django.db.backends.base.base import BaseDatabaseWrapper
+
+from . import instrumentation, slow_queries
+from .conf import get_alias_setting
+from .limits import limited
+
+
+R = TypeVar("R")
+
+
+class Statement:
+
+    def __init__(self, using: str) -> None:
+        self.using = using
+        self.interrupted = False
+        self.timed = False
+        self.threshold: Optional[float] = None
+        self.slow_queries: List[slow_queries.SlowQuery] = []
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self._connection: Optional[BaseDatabaseWrapper] = None
+        self._lock = Lock()
+
+    def run(self, func: Callable[..., R], *args, **kwargs) -> Optional[R]:
+        with self._lock:
+            if self.interrupted:
+                return None
+            self._connection = connections[self.using]
+        if self.timed:
+            self.started = time.perf_counter()
+        try:
+            if self.threshold is None:
+                return func(*args, **kwargs)
+            with connections[self.using].execute_wrapper(partial(slow_queries.collect, self.slow_queries, self.threshold, self.using)):
+                return func(*args, **kwargs)
+        finally:
+            if self.timed:
+                self.finished = time.perf_counter()
+            with self._lock:
+                self._connection = None
+
+    async def arun(self, func: Callable[..., Awaitable[R]], *args, **kwargs) -> Optional[R]:
+        # NOTE: NATIVE ASYNC ENGINES RUN ON THE EVENT LOOP, THE DRIVER INTERRUPTS ITS STATEMENT WHEN CANCELLED.
+        if self.interrupted:
+            return None
+        if self.timed:
+            self.started = time.perf_counter()
+        try:
+            return await func(self, *args, **kwargs)
+        finally:
+            if self.timed:
+                self.finished = time.perf_counter()
+
+    def interrupt(self) -> None:
+        # CAUTION: the lock guarantees the connection is not running the statement of another call
+        with self._lock:
+            self.interrupted = True
+            if self._connection is not None:
+                interrupt_connection(self._connection)
+
+
+def interrupt_connection(connection: BaseDatabaseWrapper) -> bool:
+    # NOTE: `sqlite3.Connection.interrupt()` AND `psycopg` `connection.cancel()`
+    #       ARE SAFE TO CALL FROM ANOTHER THREAD THAN THE ONE RUNNING THE STATEMENT.
+    raw_connection: Any = connection.connection
+    if raw_connection is None:
+        return False
+    for name in ("interrupt", "cancel"):
+        method = getattr(raw_connection, name, None)
+        if method is not None:
+            method()
+            return True
+    return False
+
+
+def interruptible(func: Callable[..., R], using: str, to_async: Optional[Callable[[Callable[..., Any]], Callable[..., Awaitable[Any]]]]) -> Callable[..., Awaitable[R]]:
+    # NOTE: WITHOUT `to_async`, `func` IS A COROUTINE FUNCTION OF A NATIVE ASYNC ENGINE, TAKING THE STATEMENT FIRST.
+    call = Statement.arun if to_async is None else to_async(Statement.run)
+    if get_alias_setting("MAX_CONCURRENCY", using) is not None:
+        # NOTE: THE WAIT FOR A SLOT OF THE LIMITER IS PART OF THE QUEUE WAIT OF THE CALL.
+        call = limited(call, using)
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        statement = Statement(using)
+        statement.threshold = slow_queries.get_threshold()
+        if not instrumentation.get_sinks():
+            try:
+                return await call(statement, func, *args, **kwargs)
+            except asyncio.CancelledError:
+                statement.interrupt()
+                raise
+            finally:
+                if statement.slow_queries:
+                    slow_queries.report(statement.slow_queries)
+        statement.timed = True
+        start = time.perf_counter()
+        result = error = None
+        try:
+            result = await call(statement, func, *args, **kwargs)
+            return result
+        except asyncio.CancelledError as e:
+            error = e
+            statement.interrupt()
+            raise
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            record(statement, func, args, start, result, error)
+            if statement.slow_queries:
+                slow_queries.report(statement.slow_queries)
+
+    return wrapper
+
+
+def record(statement: Statement, func: Callable[..., Any], args: tuple, start: float, result: Any, error: Optional[BaseException]) -> None:
+    end = time.perf_counter()
+    # NOTE: A STATEMENT CANCELLED BEFORE IT REACHED THE THREAD SPENT ALL OF ITS TIME QUEUED.
+    started = statement.started if statement.started is not None else end
+    finished = statement.finished if statement.finished is not None else started
+    method, model = instrumentation.describe_call(func, args)
+    rows, size = instrumentation.estimate_size(result) if error is None else (None, None)
+    instrumentation.emit(instrumentation.CallRecord(
+        method, model, statement.using,
+        queue_wait=max(started - start, 0.0), exec_time=max(finished - started, 0.0), total_time=end - start,
+        rows=rows, bytes=size, error=error,
+    ))
@@ -0,0 +1,104 @@
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from heapq import heappop, heappush
+from itertools import count
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+from weakref import WeakKeyDictionary
+
+from .conf import get_alias_setting
+
+
+R = TypeVar("R")
+
+PRIORITIES = {"interactive": 0, "batch": 1}
+
+_priority: ContextVar[int] = ContextVar("asgimod_priority", default=PRIORITIES["interactive"])
+_limiters: "WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, Limiter]]" = WeakKeyDictionary()
+
+
+class Overloaded(Exception):
+    pass
+
+
+class Limiter:
+
+    def __init__(self, concurrency: int, queue_size: Optional[int] = None) -> None:
+        if concurrency <= 0:
+            raise ValueError("Concurrency must be strictly positive.")
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self._active = 0
+        self._queued = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._counter = count()
+
+    async def acquire(self, priority: int = PRIORITIES["interactive"], timeout: Optional[float] = None) -> None:
+        if self._active < self.concurrency and not self._queued:
+            self._active += 1
+            return
+        if self.queue_size is not None and self._queued >= self.queue_size:
+            raise Overloaded("Queue of %d pending calls is full" % self.queue_size)
+        future = asyncio.get_running_loop().create_future()
+        heappush(self._waiters, (priority, next(self._counter), future))
+        self._queued += 1
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise Overloaded("Timed out after %ss waiting in queue" % timeout) from None
+        except asyncio.CancelledError:
+            # CAUTION: the slot may have been handed over right before the cancellation
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+        finally:
+            self._queued -= 1
+
+    def release(self) -> None:
+        # NOTE: SLOTS ARE HANDED OVER TO THE NEXT WAITER BY PRIORITY, THEN BY ARRIVAL.
+        while self._waiters:
+            _, _, future = heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._active -= 1
+
+
+def get_limiter(using: str) -> Optional[Limiter]:
+    concurrency = get_alias_setting("MAX_CONCURRENCY", using)
+    if concurrency is None:
+        return None
+    queue_size = get_alias_setting("MAX_QUEUE", using)
+    loop_limiters = _limiters.setdefault(asyncio.get_running_loop(), {})
+    limiter = loop_limiters.get(using)
+    if limiter is None or (limiter.concurrency, limiter.queue_size) != (concurrency, queue_size):
+        limiter = loop_limiters[using] = Limiter(concurrency, queue_size)
+    return limiter
+
+
+def limited(func: Callable[..., Awaitable[R]], using: str) -> Callable[..., Awaitable[R]]:
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        limiter = get_limiter(using)
+        if limiter is None:
+            return await func(*args, **kwargs)
+        await limiter.acquire(_priority.get(), get_alias_setting("QUEUE_TIMEOUT", using))
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            limiter.release()
+
+    return wrapper
+
+
+@contextmanager
+def priority(name: str):
+    if name not in PRIORITIES:
+        raise ValueError("Priority must be one of %r, got %r" % (tuple(PRIORITIES), name))
+    token = _priority.set(PRIORITIES[name])
+    try:
+        yield
+    finally:
+        _priority.reset(token)
@@ -0,0 +1,134 @@
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+from typing import Any, Awaitable, Dict, List, Optional, Tuple, Type
+
+from django.db import models, router
+from django.db.models.fields.related_descriptors import ForwardManyToOneDescriptor, ReverseOneToOneDescriptor
+
+from .executors import database_sync_to_async
+
+
+_relation_loader: ContextVar[Optional["RelationLoader"]] = ContextVar("asgimod_relation_loader", default=None)
+
+
+class RelationLoader:
+
+    def __init__(self) -> None:
+        self._pending: Dict[Tuple[Type[models.Model], str, str], Dict[Any, List[asyncio.Future]]] = {}
+        self._scheduled = False
+        self._tasks = set()
+
+    def load(self, model: Type[models.Model], attname: str, value: Any, using: str) -> "asyncio.Future[Optional[models.Model]]":
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault((model, attname, using), {}).setdefault(value, []).append(future)
+        if not self._scheduled:
+            # NOTE: LOADS REQUESTED WITHIN THE SAME LOOP ITERATION ARE DISPATCHED TOGETHER.
+            self._scheduled = True
+            loop.call_soon(self._dispatch)
+        return future
+
+    def _dispatch(self) -> None:
+        self._scheduled = False
+        pending, self._pending = self._pending, {}
+        batches_by_db: Dict[str, list] = {}
+        for (model, attname, using), futures_by_value in pending.items():
+            batches_by_db.setdefault(using, []).append((model, attname, futures_by_value))
+        for using, batches in batches_by_db.items():
+            task = asyncio.ensure_future(self._load_batches(using, batches))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            task.add_done_callback(partial(self._cancel_batches, batches))
+
+    async def _load_batches(self, using: str, batches: list) -> None:
+        try:
+            results = await database_sync_to_async(self._fetch_batches, using)(using, [(model, attname, list(futures_by_value)) for model, attname, futures_by_value in batches])
+        except Exception as e:
+            for _, _, futures_by_value in batches:
+                for futures in futures_by_value.values():
+                    for future in futures:
+                        if not future.done():
+                            future.set_exception(e)
+            return
+        for (_, _, futures_by_value), objs_by_value in zip(batches, results):
+            for value, futures in futures_by_value.items():
+                for future in futures:
+                    if not future.done():
+                        future.set_result(objs_by_value.get(value))
+
+    @staticmethod
+    def _cancel_batches(batches: list, task: "asyncio.Task[None]") -> None:
+        # CAUTION: a cancelled task (even before it started) never resolves the futures, their callers would hang
+        if not task.cancelled():
+            return
+        for _, _, futures_by_value in batches:
+            for futures in futures_by_value.values():
+                for future in futures:
+                    future.cancel()
+
+    @staticmethod
+    def _fetch_batches(using: str, batches: list) -> List[Dict[Any, models.Model]]:
+        results = []
+        for model, attname, values in batches:
+            queryset = model._base_manager.db_manager(using).filter(**{f"{attname}__in": values})
+            results.append({getattr(obj, attname): obj for obj in queryset})
+        return results
+
+
+@contextmanager
+def batch_relations():
+    token = _relation_loader.set(RelationLoader())
+    try:
+        yield
+    finally:
+        _relation_loader.reset(token)
+
+
+def load_related(instance: models.Model, name: str) -> Optional[Awaitable[Optional[models.Model]]]:
+    loader = _relation_loader.get()
+    if loader is None:
+        return None
+    descriptor = getattr(instance.__class__, name, None)
+    if isinstance(descriptor, ForwardManyToOneDescriptor) and len(descriptor.field.foreign_related_fields) == 1:
+        return _load_forward(loader, instance, descriptor)
+    if isinstance(descriptor, ReverseOneToOneDescriptor):
+        return _load_reverse_one_to_one(loader, instance, descriptor)
+    return None
+
+
+async def _load_forward(loader: RelationLoader, instance: models.Model, descriptor: ForwardManyToOneDescriptor) -> Optional[models.Model]:
+    field = descriptor.field
+    if field.is_cached(instance):
+        return field.get_cached_value(instance)
+    value = getattr(instance, field.attname)
+    related_model = field.remote_field.model
+    obj = None
+    if value is not None:
+        using = router.db_for_read(related_model, instance=instance)
+        obj = await loader.load(related_model, field.target_field.attname, value, using)
+    if obj is None and not field.null:
+        raise descriptor.RelatedObjectDoesNotExist("%s has no %s." % (field.model.__name__, field.name))
+    field.set_cached_value(instance, obj)
+    if obj is not None and not field.remote_field.multiple:
+        field.remote_field.set_cached_value(obj, instance)
+    return obj
+
+
+async def _load_reverse_one_to_one(loader: RelationLoader, instance: models.Model, descriptor: ReverseOneToOneDescriptor) -> models.Model:
+    related = descriptor.related
+    if related.is_cached(instance):
+        obj = related.get_cached_value(instance)
+    else:
+        value = getattr(instance, related.field.target_field.attname)
+        obj = None
+        if value is not None:
+            using = router.db_for_read(related.related_model, instance=instance)
+            obj = await loader.load(related.related_model, related.field.attname, value, using)
+        related.set_cached_value(instance, obj)
+        if obj is not None:
+            related.field.set_cached_value(obj, instance)
+    if obj is None:
+        raise descriptor.RelatedObjectDoesNotExist("%s has no %s." % (instance.__class__.__name__, related.get_accessor_name()))
+    return obj
@@ -1,15 +1,118 @@
-from typing import Type, TypeVar
+from typing import Any, Dict, Optional, Type, TypeVar
 
 from django.db import models, DEFAULT_DB_ALIAS
 from django.core.exceptions import SynchronousOnlyOperation
+from django.db.models.fields.related_descriptors import ForwardManyToOneDescriptor, ManyToManyDescriptor, ReverseManyToOneDescriptor, ReverseOneToOneDescriptor
+from django.db.models.query_utils import DeferredAttribute
 
-from .sync import sync_to_async
+from . import identity
+from .buffers import get_write_buffer
+from .executors import database_sync_to_async
+from .loaders import load_related
+from .routers import mark_written
 from .db import AsyncQuerySet, AsyncManyToManyRelatedQuerySet, AsyncManyToOneRelatedQuerySet
 
 
 T = TypeVar("T", bound=models.Model)
 
 
+class Resolved:
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any) -> None:
+        self.value = value
+
+    def __await__(self):
+        # NOTE: A GENERATOR THAT NEVER YIELDS, AWAITING IT DOES NOT SUSPEND THE CALLER.
+        return self.value
+        yield
+
+
+class AsyncAttribute:
+
+    def __init__(self, name: str, descriptor: Any = None) -> None:
+        self.name = name
+        self.descriptor = descriptor
+
+    def __get__(self, instance: Optional["AsyncMixin"], owner: Optional[type] = None):
+        if instance is None:
+            return self
+        return self.get(instance)
+
+    def get(self, instance: "AsyncMixin"):
+        try:
+            item = getattr(instance, self.name)
+        except SynchronousOnlyOperation:
+            return instance._aget_related(self.name)
+        if not isinstance(item, models.Manager):
+            return Resolved(item)
+        if "many_to_many" in item.__class__.__mro__[0].__qualname__:
+            return AsyncManyToManyRelatedQuerySet(item.model, item)
+        return AsyncManyToOneRelatedQuerySet(item.model, item)
+
+    async def _aget(self, instance: "AsyncMixin"):
+        # CAUTION: the descriptor is called directly, `getattr()` would mask its `AttributeError` subclasses with `__getattr__`
+        return await database_sync_to_async(self.descriptor.__get__, instance._state.db or DEFAULT_DB_ALIAS)(instance, instance.__class__)
+
+
+class AsyncField(AsyncAttribute):
+
+    def get(self, instance: "AsyncMixin"):
+        try:
+            return Resolved(instance.__dict__[self.descriptor.field.attname])
+        except KeyError:
+            return self._aget(instance)
+
+
+class AsyncForwardRelation(AsyncAttribute):
+
+    def get(self, instance: "AsyncMixin"):
+        field = self.descriptor.field
+        if field.is_cached(instance):
+            return Resolved(field.get_cached_value(instance))
+        if field.null and field.attname in instance.__dict__ and instance.__dict__[field.attname] is None:
+            return Resolved(None)
+        return identity.load_related(instance, self.name) or load_related(instance, self.name) or self._aget(instance)
+
+
+class AsyncReverseOneToOneRelation(AsyncAttribute):
+
+    def get(self, instance: "AsyncMixin"):
+        related = self.descriptor.related
+        if related.is_cached(instance):
+            obj = related.get_cached_value(instance)
+            if obj is not None:
+                return Resolved(obj)
+        return load_related(instance, self.name) or self._aget(instance)
+
+
+class AsyncRelatedManager(AsyncAttribute):
+
+    def __init__(self, name: str, descriptor: Any, queryset_class: Type[AsyncQuerySet]) -> None:
+        super().__init__(name, descriptor)
+        self.queryset_class = queryset_class
+
+    def get(self, instance: "AsyncMixin"):
+        manager = self.descriptor.__get__(instance, instance.__class__)
+        return self.queryset_class(manager.model, manager)
+
+
+def get_async_attribute(cls: Type[models.Model], name: str) -> AsyncAttribute:
+    # NOTE: THE KIND OF ATTRIBUTE IS RESOLVED ONCE, FROM THE DESCRIPTOR DJANGO INSTALLED ON THE MODEL.
+    descriptor = next((klass.__dict__[name] for klass in cls.__mro__ if name in klass.__dict__), None)
+    if isinstance(descriptor, ForwardManyToOneDescriptor):
+        return AsyncForwardRelation(name, descriptor)
+    if isinstance(descriptor, ReverseOneToOneDescriptor):
+        return AsyncReverseOneToOneRelation(name, descriptor)
+    if isinstance(descriptor, ManyToManyDescriptor):
+        return AsyncRelatedManager(name, descriptor, AsyncManyToManyRelatedQuerySet)
+    if isinstance(descriptor, ReverseManyToOneDescriptor):
+        return AsyncRelatedManager(name, descriptor, AsyncManyToOneRelatedQuerySet)
+    if isinstance(descriptor, DeferredAttribute) and not descriptor.field.is_relation:
+        return AsyncField(name, descriptor)
+    return AsyncAttribute(name, descriptor)
+
+
 class AsyncMixinMeta(models.base.ModelBase):
 
     def __new__(cls, name, bases, attrs, **kwargs):
@@ -36,27 +139,59 @@ class AsyncMixinMeta(models.base.ModelBase):
         cls._asgimod_cached_props["async_related_fieldmames"] = fieldnames
         return fieldnames
 
+    @property
+    def _async_attributes(cls: Type[T]) -> Dict[str, AsyncAttribute]:
+        # NOTE: REVERSE RELATIONS ARE ONLY KNOWN ONCE ALL MODELS ARE LOADED, ATTRIBUTES ARE
+        #       BUILT ON FIRST ACCESS AND INSTALLED ON THE CLASS, `__getattr__` IS NOT HIT AGAIN.
+        try:
+            return cls._asgimod_cached_props["async_attributes"]
+        except KeyError:
+            pass
+        attributes = {}
+        for attr in cls._async_related_fieldmames:
+            attributes[attr] = get_async_attribute(cls, attr[1:])
+            if not any(attr in klass.__dict__ for klass in cls.__mro__):
+                setattr(cls, attr, attributes[attr])
+        cls._asgimod_cached_props["async_attributes"] = attributes
+        return attributes
+
 
 class AsyncMixin(models.Model, metaclass=AsyncMixinMeta):
 
     def __getattr__(self, attr: str):
-        if attr not in self.__class__._async_related_fieldmames:
-            raise AttributeError("%r object has no attribute %r" % (self.__class__.__name__, attr))
         try:
-            item = getattr(self, attr[1:])
-            if not isinstance(item, models.Manager):
-                raise SynchronousOnlyOperation
-            if "many_to_many" in item.__class__.__mro__[0].__qualname__:
-                return AsyncManyToManyRelatedQuerySet(item.model, item)
-            return AsyncManyToOneRelatedQuerySet(item.model, item)
-        except SynchronousOnlyOperation:
-            return sync_to_async(getattr)(self, attr[1:])
+            attribute = self.__class__._async_attributes[attr]
+        except KeyError:
+            raise AttributeError("%r object has no attribute %r" % (self.__class__.__name__, attr)) from None
+        return attribute.get(self)
+
+    async def _aget_related(self, name: str):
+        return await database_sync_to_async(getattr, self._state.db or DEFAULT_DB_ALIAS)(self, name)
 
     async def asave(self, force_insert=False, force_update=False, using=DEFAULT_DB_ALIAS, update_fields=None):
-        return await sync_to_async(self.save)(force_insert=force_insert, force_update=force_update, using=using, update_fields=update_fields)
+        mark_written(using)
+        buffer = get_write_buffer()
+        if buffer is not None:
+            future = buffer.save(self, using, force_insert=force_insert, force_update=force_update, update_fields=update_fields)
+            if future is not None:
+                await future
+                self._remember_identity(using)
+                return
+        await database_sync_to_async(self.save, using)(force_insert=force_insert, force_update=force_update, using=using, update_fields=update_fields)
+        self._remember_identity(using)
+
+    def _remember_identity(self, using: str):
+        # NOTE: THE SAVED INSTANCE REPLACES THE ONE OF THE IDENTITY MAP, IT HOLDS THE LATEST STATE.
+        identities = identity.get_identity_map()
+        if identities is not None and not self.get_deferred_fields():
+            identities.add(self, using, replace=True)
 
     async def adelete(self, using=DEFAULT_DB_ALIAS, keep_parents=False):
-        return await sync_to_async(self.delete)(using=using, keep_parents=keep_parents)
+        mark_written(using)
+        identities = identity.get_identity_map()
+        if identities is not None:
+            identities.discard(self, using)
+        return await database_sync_to_async(self.delete, using)(using=using, keep_parents=keep_parents)
 
     class Meta:
         abstract = True
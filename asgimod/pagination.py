@@ -0,0 +1,88 @@
+import base64
+import datetime
+import json
+from typing import Any, List, NamedTuple, Optional, Sequence, Tuple, Type
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.db.models import Q
+from django.db.models.query import ModelIterable, ValuesIterable
+
+
+class Page(NamedTuple):
+    items: List[Any]
+    next_cursor: Optional[str]
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+
+class CursorEncoder(DjangoJSONEncoder):
+
+    def default(self, o: Any) -> Any:
+        # NOTE: `DjangoJSONEncoder` TRUNCATES TIMES TO MILLISECONDS, CURSOR VALUES MUST COMPARE EXACTLY.
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def get_keyset(model: Type[models.Model], order_by: Sequence[str], iterable_class: Type[Any] = ModelIterable) -> List[Tuple[str, bool]]:
+    if not issubclass(iterable_class, (ModelIterable, ValuesIterable)):
+        raise ValueError("Keyset pagination only supports model instances and `values()` rows, not `values_list()` rows")
+    keyset = []
+    for name in order_by:
+        if not isinstance(name, str) or name == "?":
+            raise ValueError("Keyset pagination only supports ordering by field names, got %r" % (name,))
+        descending = name.startswith("-")
+        name = name.lstrip("-+")
+        try:
+            field = model._meta.pk if name == "pk" else model._meta.get_field(name)
+        except FieldDoesNotExist:
+            raise ValueError("Keyset pagination only supports ordering by fields of %r, got %r" % (model.__name__, name)) from None
+        if not field.concrete:
+            raise ValueError("Keyset pagination only supports ordering by concrete fields, got %r" % name)
+        # NOTE: `NULL` NEVER COMPARES IN THE SEEK FILTER, ROWS AFTER A `NULL` CURSOR VALUE WOULD BE SKIPPED.
+        if field.null:
+            raise ValueError("Keyset pagination only supports ordering by non-nullable fields, got %r" % name)
+        keyset.append((field.attname, descending))
+    # NOTE: THE PRIMARY KEY BREAKS TIES, SO THAT THE ORDERING IS TOTAL.
+    if model._meta.pk.attname not in [attname for attname, _ in keyset]:
+        keyset.append((model._meta.pk.attname, keyset[-1][1] if keyset else False))
+    return keyset
+
+
+def get_ordering(keyset: List[Tuple[str, bool]]) -> List[str]:
+    return [f"-{attname}" if descending else attname for attname, descending in keyset]
+
+
+def get_filter(keyset: List[Tuple[str, bool]], values: Sequence[Any]) -> Q:
+    # NOTE: (a, b) > (x, y) <=> a > x OR (a = x AND b > y), WITH `<` FOR DESCENDING FIELDS.
+    condition = Q()
+    for i, (attname, descending) in enumerate(keyset):
+        lookup = {previous: value for (previous, _), value in zip(keyset[:i], values[:i])}
+        lookup[f"{attname}__{'lt' if descending else 'gt'}"] = values[i]
+        condition |= Q(**lookup)
+    return condition
+
+
+def get_values(keyset: List[Tuple[str, bool]], item: Any) -> List[Any]:
+    if isinstance(item, dict):
+        return [item[attname] for attname, _ in keyset]
+    return [getattr(item, attname) for attname, _ in keyset]
+
+
+def encode_cursor(keyset: List[Tuple[str, bool]], values: Sequence[Any]) -> str:
+    data = json.dumps([get_ordering(keyset), list(values)], cls=CursorEncoder, separators=(",", ":"))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+
+def decode_cursor(keyset: List[Tuple[str, bool]], cursor: str) -> List[Any]:
+    try:
+        ordering, values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid pagination cursor") from None
+    if ordering != get_ordering(keyset) or not isinstance(values, list) or len(values) != len(keyset):
+        raise ValueError("Pagination cursor does not match the ordering")
+    return values
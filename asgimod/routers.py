@@ -0,0 +1,64 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, FrozenSet, Iterable, Optional, Type
+
+from django.db import DEFAULT_DB_ALIAS, models, router
+
+from .conf import get_setting
+
+
+_written: ContextVar[FrozenSet[str]] = ContextVar("asgimod_written", default=frozenset())
+_replicas: ContextVar[Dict[str, str]] = ContextVar("asgimod_replicas", default={})
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model: Type[models.Model], **hints) -> Optional[str]:
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        return get_read_alias(router.db_for_write(model, **hints) or DEFAULT_DB_ALIAS)
+
+    def db_for_write(self, model: Type[models.Model], **hints) -> Optional[str]:
+        return None
+
+    def allow_relation(self, obj1: models.Model, obj2: models.Model, **hints) -> Optional[bool]:
+        if get_primary_alias(obj1._state.db) == get_primary_alias(obj2._state.db):
+            return True
+        return None
+
+
+def get_primary_alias(using: Optional[str]) -> Optional[str]:
+    for primary, replicas in get_setting("REPLICAS").items():
+        if using in replicas:
+            return primary
+    return using
+
+
+def get_read_alias(primary: str) -> str:
+    replicas = get_setting("REPLICAS").get(primary)
+    if not replicas or primary in _written.get():
+        return primary
+    # NOTE: THE REPLICA IS CHOSEN ONCE PER CONTEXT, SO READS OF A TASK ARE MONOTONIC.
+    chosen = _replicas.get()
+    if chosen.get(primary) not in replicas:
+        chosen = {**chosen, primary: random.choice(replicas)}
+        _replicas.set(chosen)
+    return chosen[primary]
+
+
+def mark_written(using: str) -> None:
+    # NOTE: READS OF THE CONTEXT (AND OF THE TASKS IT CREATES) STICK TO THE PRIMARY AFTER A WRITE.
+    written = _written.get()
+    if using not in written:
+        _written.set(written | {using})
+
+
+@contextmanager
+def use_primary(aliases: Optional[Iterable[str]] = None):
+    token = _written.set(_written.get() | frozenset(aliases if aliases is not None else get_setting("REPLICAS")))
+    try:
+        yield
+    finally:
+        _written.reset(token)
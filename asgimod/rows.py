@@ -0,0 +1,77 @@
+import keyword
+from functools import lru_cache, partial
+from itertools import chain
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Type
+
+from django.db.models.query import BaseIterable
+from django.db.models.sql.constants import MULTI
+
+
+class Row(tuple):
+    __slots__ = ()
+    _fields: Tuple[str, ...] = ()
+
+    def __repr__(self) -> str:
+        return "Row(%s)" % ", ".join("%s=%r" % item for item in zip(self._fields, self))
+
+    def __reduce__(self):
+        return make_row, (self._fields, tuple(self))
+
+    def as_dict(self) -> Dict[str, Any]:
+        return dict(zip(self._fields, self))
+
+
+@lru_cache(maxsize=None)
+def get_row_class(names: Tuple[str, ...]) -> Type[Row]:
+    for name in names:
+        if not name.isidentifier() or keyword.iskeyword(name) or hasattr(Row, name):
+            raise ValueError("Row field names must be identifiers not shadowing the row attributes, got %r" % name)
+    # NOTE: SAME LAYOUT AS `collections.namedtuple`, ROWS ARE TUPLES BUILT WITHOUT A PYTHON `__init__`.
+    attrs: Dict[str, Any] = {name: property(itemgetter(i)) for i, name in enumerate(names)}
+    return type("Row", (Row,), {"__slots__": (), "_fields": names, **attrs})
+
+
+def make_row(names: Tuple[str, ...], values: Tuple[Any, ...]) -> Row:
+    return tuple.__new__(get_row_class(names), values)
+
+
+def get_row_converter(converters: Dict[int, Tuple[List[Callable[..., Any]], Any]], connection: Any, factory: Callable[[Iterable[Any]], Tuple[Any, ...]] = tuple) -> Optional[Callable[[Tuple[Any, ...]], Tuple[Any, ...]]]:
+    if not converters:
+        return None if factory is tuple else factory
+    # NOTE: THE CONVERTERS OF EACH COLUMN ARE BOUND ONCE PER QUERY, NOT LOOKED UP PER ROW.
+    positions = [(pos, convs[0] if len(convs) == 1 else None, convs, expression) for pos, (convs, expression) in converters.items()]
+
+    def convert(row: Tuple[Any, ...]) -> Tuple[Any, ...]:
+        row = list(row)
+        for pos, converter, convs, expression in positions:
+            if converter is not None:
+                row[pos] = converter(row[pos], expression, connection)
+                continue
+            value = row[pos]
+            for converter in convs:
+                value = converter(value, expression, connection)
+            row[pos] = value
+        return factory(row)
+
+    return convert
+
+
+class RowIterable(BaseIterable):
+    named = False
+
+    def __iter__(self):
+        queryset = self.queryset
+        query = queryset.query
+        compiler = query.get_compiler(queryset.db)
+        results = compiler.execute_sql(MULTI, chunked_fetch=self.chunked_fetch, chunk_size=self.chunk_size)
+        # NOTE: SAME COLUMN ORDER AS THE SQL, SEE `django.db.models.query.NamedValuesListIterable`.
+        factory = partial(tuple.__new__, get_row_class(tuple([*query.extra_select, *query.values_select, *query.annotation_select]))) if self.named else tuple
+        # NOTE: SAME COLUMNS AS `results_iter()`, THE OUTPUT FIELDS ARE KNOWN ONCE THE QUERY IS EXECUTED.
+        convert = get_row_converter(compiler.get_converters([select[0] for select in compiler.select[0:compiler.col_count]]), compiler.connection, factory)
+        rows: Iterable[Tuple[Any, ...]] = chain.from_iterable(results)
+        return iter(rows) if convert is None else map(convert, rows)
+
+
+class NamedRowIterable(RowIterable):
+    named = True
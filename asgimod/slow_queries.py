@@ -0,0 +1,135 @@
+import asyncio
+import contextvars
+import logging
+import time
+import traceback
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from django.core.signals import setting_changed
+from django.db import connections
+
+from . import executors
+from .conf import get_setting
+
+
+logger = logging.getLogger("asgimod.slow_queries")
+
+_MISSING = object()
+_config: Any = _MISSING
+_explaining: ContextVar[bool] = ContextVar("asgimod_explaining", default=False)
+_explained: Dict[Tuple[str, str], float] = {}
+_tasks: Set["asyncio.Task[None]"] = set()
+
+
+class SlowQuery:
+    __slots__ = ("sql", "params", "using", "duration", "many", "stack", "task", "plan")
+
+    def __init__(self, sql: str, params: Any, using: str, duration: float, many: bool) -> None:
+        self.sql = sql
+        self.params = params
+        self.using = using
+        self.duration = duration
+        self.many = many
+        self.stack: Optional[traceback.StackSummary] = None
+        self.task: Optional[str] = None
+        self.plan: Optional[str] = None
+
+
+def get_config() -> Optional[Dict[str, Any]]:
+    global _config
+    config = _config
+    if config is _MISSING:
+        config = get_setting("SLOW_QUERIES")
+        if config is not None:
+            config = {"THRESHOLD": 0.5, "EXPLAIN": True, "EXPLAIN_INTERVAL": 60.0, "MAX_EXPLAINS": 1, "STACK_LIMIT": 16, **config}
+        _config = config
+    return config
+
+
+def get_threshold() -> Optional[float]:
+    config = get_config()
+    if config is None or _explaining.get():
+        return None
+    return config["THRESHOLD"]
+
+
+def collect(slow_queries: List[SlowQuery], threshold: float, using: str, execute: Callable[..., Any], sql: str, params: Any, many: bool, context: Dict[str, Any]) -> Any:
+    # NOTE: RUNS ON THE DATABASE THREAD AS AN EXECUTE WRAPPER OF THE CONNECTION.
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - start
+        if duration >= threshold:
+            slow_queries.append(SlowQuery(sql, params, using, duration, many))
+
+
+def report(slow_queries: List[SlowQuery]) -> None:
+    # NOTE: CALLED ON THE EVENT LOOP BY THE AWAITING COROUTINE, THE STACK IS ITS AWAIT CHAIN.
+    config = get_config()
+    if config is None:
+        return
+    stack = traceback.StackSummary.from_list(traceback.extract_stack(limit=config["STACK_LIMIT"] + 2)[:-2])
+    task = asyncio.current_task()
+    for slow_query in slow_queries:
+        slow_query.stack = stack
+        slow_query.task = task.get_name() if task is not None else None
+        logger.warning(
+            "Slow query (%.3fms) on %r in task %s: %s; params=%r\nStack (most recent call last):\n%s",
+            slow_query.duration * 1000, slow_query.using, slow_query.task, slow_query.sql, slow_query.params, "".join(stack.format()).rstrip(),
+            extra={"asgimod_slow_query": slow_query},
+        )
+        if config["EXPLAIN"] and _should_explain(slow_query, config):
+            # CAUTION: the plan is captured in an empty context, out of transactions and batches of the caller
+            task = contextvars.Context().run(asyncio.ensure_future, _aexplain(slow_query))
+            _tasks.add(task)
+            task.add_done_callback(_tasks.discard)
+
+
+def _should_explain(slow_query: SlowQuery, config: Dict[str, Any]) -> bool:
+    if slow_query.many or not slow_query.sql.lstrip()[:6].upper() == "SELECT" or len(_tasks) >= config["MAX_EXPLAINS"]:
+        return False
+    if not connections[slow_query.using].features.supports_explaining_query_execution:
+        return False
+    now = time.monotonic()
+    key = (slow_query.using, slow_query.sql)
+    if now - _explained.get(key, -config["EXPLAIN_INTERVAL"]) < config["EXPLAIN_INTERVAL"]:
+        return False
+    if len(_explained) > 1000:
+        for stale_key in [key for key, explained in _explained.items() if now - explained >= config["EXPLAIN_INTERVAL"]]:
+            del _explained[stale_key]
+    _explained[key] = now
+    return True
+
+
+def explain(sql: str, params: Any, using: str) -> str:
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        cursor.execute(f"{connection.ops.explain_query_prefix()} {sql}", params)
+        return "\n".join(" ".join(map(str, row)) for row in cursor.fetchall())
+
+
+async def _aexplain(slow_query: SlowQuery) -> None:
+    _explaining.set(True)
+    try:
+        slow_query.plan = await executors.database_sync_to_async(explain, slow_query.using)(slow_query.sql, slow_query.params, slow_query.using)
+    except Exception:
+        logger.exception("Failed to explain slow query on %r: %s", slow_query.using, slow_query.sql)
+        return
+    logger.warning("Plan of slow query on %r: %s\n%s", slow_query.using, slow_query.sql, slow_query.plan, extra={"asgimod_slow_query": slow_query})
+
+
+async def wait_explains() -> None:
+    while _tasks:
+        await asyncio.wait(list(_tasks))
+
+
+def _reset(*, setting, **kwargs):
+    global _config
+    if setting == "ASGIMOD":
+        _config = _MISSING
+        _explained.clear()
+
+
+setting_changed.connect(_reset)
@@ -0,0 +1,40 @@
+from contextlib import asynccontextmanager
+from typing import Optional
+
+import django
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from .executors import acquire_pinned_executor, database_sync_to_async, is_pinned, pin_executor, release_pinned_executor
+
+
+@asynccontextmanager
+async def aatomic(using: Optional[str] = None, savepoint: bool = True, durable: bool = False):
+    using = using or DEFAULT_DB_ALIAS
+    if durable and django.VERSION < (3, 2):
+        raise ValueError("Durable aatomic() blocks require Django>=3.2")
+    if is_pinned(using):
+        # NOTE: NESTED BLOCKS RUN ON THE EXECUTOR OF THE OUTERMOST BLOCK (AS SAVEPOINTS).
+        async with _atomic(using, savepoint, durable):
+            yield
+        return
+    # CAUTION: the connection of the thread sensitive executor is shared with unrelated tasks, they would join the transaction
+    executor = acquire_pinned_executor(using, dedicated=True)
+    try:
+        with pin_executor(executor, using):
+            async with _atomic(using, savepoint, durable):
+                yield
+    finally:
+        release_pinned_executor(executor, using)
+
+
+@asynccontextmanager
+async def _atomic(using: str, savepoint: bool, durable: bool):
+    # NOTE: `durable` IS ONLY PASSED WHEN SET, DJANGO<3.2 HAS NO SUCH PARAMETER.
+    atomic = transaction.atomic(using, savepoint, durable) if durable else transaction.atomic(using, savepoint)
+    await database_sync_to_async(atomic.__enter__, using)()
+    try:
+        yield
+    except BaseException as e:
+        await database_sync_to_async(atomic.__exit__, using)(type(e), e, e.__traceback__)
+        raise
+    await database_sync_to_async(atomic.__exit__, using)(None, None, None)
@@ -14,6 +14,11 @@ install_requires = [
     "Django>=3.0"
 ]
 
+extras_require = {
+    "sqlite": ["aiosqlite>=0.17"],
+    "numpy": ["numpy>=1.20"],
+}
+
 # Require python 3.8
 if sys.version_info.major != 3 and sys.version_info.minor < 8:
     sys.exit("'asgimod' requires Python >= 3.8")
@@ -43,5 +48,6 @@ setup(
     packages=find_packages(exclude=("testapp", "testproj")),
     zip_safe=True,
     install_requires=install_requires,
+    extras_require=extras_require,
     include_package_data=True,
 )
@@ -0,0 +1,277 @@
+import asyncio
+import json
+import time
+import tracemalloc
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import QuerySet
+from django.test.utils import override_settings, setup_databases, teardown_databases
+
+from asgimod import engines
+from asgimod.db import agather
+from asgimod.sync import sync_to_async
+from testapp.models import Box, Pizza, Price, Topping
+
+
+ASGIMOD = "asgimod"
+ASGIMOD_NATIVE = "asgimod-native"
+DJANGO_ASYNC = "django-async"
+DJANGO_SYNC = "django-sync"
+
+MIN_OPS = 3
+
+
+class Case(NamedTuple):
+    name: str
+    items: int
+    variants: Dict[str, Callable[[], Any]]
+
+
+class Result(NamedTuple):
+    case: str
+    variant: str
+    ops: int
+    ops_per_second: float
+    items_per_second: float
+    p50: float
+    p99: float
+    peak_memory: int
+
+
+def percentile(samples: List[float], q: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, round(q * (len(samples) - 1)))]
+
+
+class Command(BaseCommand):
+    help = "Benchmarks asgimod against the sync ORM and the native async methods of Django on the testapp models."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, nargs="+", default=[10, 10_000, 1_000_000], help="Sizes of the evaluated querysets.")
+        parser.add_argument("--concurrency", type=int, default=50, help="Number of concurrent gets of the gather case.")
+        parser.add_argument("--budget", type=float, default=2.0, help="Seconds spent measuring each variant.")
+        parser.add_argument("--max-ops", type=int, default=1000, help="Maximum operations measured for each variant.")
+        parser.add_argument("--executor", choices=["thread_sensitive", "pool"], help="Overrides ASGIMOD['EXECUTOR'].")
+        parser.add_argument("--only", nargs="+", default=[], help="Runs only the cases starting with these names.")
+        parser.add_argument("--json", dest="json_path", help="Writes the results to this file.")
+        parser.add_argument("--baseline", help="Compares p50 latencies with the results of a previous --json run.")
+        parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed p50 regression against the baseline.")
+
+    def handle(self, *args, **options):
+        asgimod_settings = dict(getattr(settings, "ASGIMOD", {}))
+        if options["executor"]:
+            asgimod_settings["EXECUTOR"] = options["executor"]
+        # NOTE: RUNS ON THROWAWAY TEST DATABASES, THE CONFIGURED DATABASES ARE NEVER WRITTEN.
+        old_config = setup_databases(verbosity=0, interactive=False, aliases={"default"})
+        try:
+            with override_settings(ASGIMOD=asgimod_settings):
+                self.populate(max(options["rows"]))
+                results = self.run_cases(self.get_cases(options), options)
+        finally:
+            connections.close_all()
+            teardown_databases(old_config, verbosity=0)
+        self.report(results)
+        if options["json_path"]:
+            with open(options["json_path"], "w") as f:
+                json.dump([result._asdict() for result in results], f, indent=2)
+        if options["baseline"]:
+            self.compare(results, options["baseline"], options["tolerance"])
+
+    def populate(self, rows: int) -> None:
+        self.stderr.write(f"Populating {rows} prices ...")
+        Box.objects.bulk_create([Box(name=f"Box {i}") for i in range(100)])
+        Topping.objects.bulk_create([Topping(name=f"Topping {i}") for i in range(100)])
+        for start in range(0, max(rows, 100), 10_000):
+            Price.objects.bulk_create([Price(amount=Decimal(i % 10_000) / 100) for i in range(start, min(start + 10_000, max(rows, 100)))])
+        boxes, prices = list(Box.objects.all()), list(Price.objects.order_by("id")[:100])
+        Pizza.objects.bulk_create([Pizza(name=f"Pizza {i}", box=boxes[i], price=prices[i]) for i in range(100)])
+
+    def get_cases(self, options) -> List[Case]:
+        box_ids = list(Box.objects.values_list("id", flat=True))
+        toppings = list(Topping.objects.all()[:5])
+        pizzas = list(Pizza.objects.all())
+        cached_pizzas = list(Pizza.objects.select_related("box"))
+        native = hasattr(QuerySet, "aget")
+        native_m2m = hasattr(Pizza.toppings.related_manager_cls, "aadd")
+        counter = iter(range(10 ** 12))
+
+        def next_box_id() -> int:
+            return box_ids[next(counter) % len(box_ids)]
+
+        def next_pizza() -> Pizza:
+            # NOTE: A CLEARED FIELDS CACHE MAKES EVERY RELATION ACCESS HIT THE DATABASE.
+            pizza = pizzas[next(counter) % len(pizzas)]
+            pizza._state.fields_cache.clear()
+            return pizza
+
+        def new_toppings() -> List[Topping]:
+            return [Topping(name="Bench") for _ in range(1000)]
+
+        cases = [
+            Case("get", 1, {
+                ASGIMOD: lambda: Box.aobjects.get(id=next_box_id()),
+                DJANGO_ASYNC: native and (lambda: Box.objects.aget(id=next_box_id())),
+                DJANGO_SYNC: lambda: Box.objects.get(id=next_box_id()),
+            }),
+        ]
+        for rows in options["rows"]:
+            cases.append(Case(f"eval[{rows}]", rows, {
+                ASGIMOD: lambda rows=rows: Price.aobjects.order_by("id")[:rows].eval(),
+                ASGIMOD_NATIVE: engines.aiosqlite is not None and (lambda rows=rows: Price.aobjects.order_by("id")[:rows].eval()),
+                DJANGO_ASYNC: native and (lambda rows=rows: self.aiterate(Price.objects.order_by("id")[:rows])),
+                DJANGO_SYNC: lambda rows=rows: list(Price.objects.order_by("id")[:rows]),
+            }))
+        rows = min(10_000, max(options["rows"]))
+        cases.extend([
+            Case(f"async_for[{rows}]", rows, {
+                ASGIMOD: lambda: self.aiterate(Price.aobjects.order_by("id")[:rows]),
+                DJANGO_ASYNC: native and (lambda: self.aiterate(Price.objects.order_by("id")[:rows].aiterator())),
+                DJANGO_SYNC: lambda: list(Price.objects.order_by("id")[:rows].iterator()),
+            }),
+            Case(f"rows[{rows}]", rows, {
+                ASGIMOD: lambda: Price.aobjects.order_by("id")[:rows].rows("id", "amount", "currency").eval(),
+                f"{ASGIMOD}-named": lambda: Price.aobjects.order_by("id")[:rows].rows("id", "amount", "currency", named=True).eval(),
+                f"{ASGIMOD}-values": lambda: Price.aobjects.order_by("id")[:rows].values("id", "amount", "currency").eval(),
+                f"{ASGIMOD}-models": lambda: Price.aobjects.order_by("id")[:rows].eval(),
+                DJANGO_SYNC: lambda: list(Price.objects.order_by("id")[:rows].values_list("id", "amount", "currency")),
+            }),
+            Case("relation", 1, {
+                ASGIMOD: lambda: next_pizza().abox,
+                DJANGO_ASYNC: lambda: sync_to_async(getattr)(next_pizza(), "box"),
+                DJANGO_SYNC: lambda: next_pizza().box,
+            }),
+            Case("relation_cached", 1, {
+                ASGIMOD: lambda: cached_pizzas[next(counter) % len(cached_pizzas)].abox,
+                DJANGO_SYNC: lambda: cached_pizzas[next(counter) % len(cached_pizzas)].box,
+            }),
+            Case("m2m_add_set", 2, {
+                ASGIMOD: lambda: self.m2m(next_pizza().atoppings, toppings),
+                DJANGO_ASYNC: native_m2m and (lambda: self.native_m2m(next_pizza().toppings, toppings)),
+                DJANGO_SYNC: lambda: (lambda manager: (manager.add(*toppings), manager.set([])))(next_pizza().toppings),
+            }),
+            Case("bulk_create", 1000, {
+                ASGIMOD: lambda: Topping.aobjects.bulk_create(new_toppings()),
+                DJANGO_ASYNC: native and (lambda: Topping.objects.abulk_create(new_toppings())),
+                DJANGO_SYNC: lambda: Topping.objects.bulk_create(new_toppings()),
+            }),
+            Case(f"gather[{options['concurrency']}]", options["concurrency"], {
+                ASGIMOD: lambda: asyncio.gather(*[Box.aobjects.get(id=next_box_id()) for _ in range(options["concurrency"])]),
+                f"{ASGIMOD}-agather": lambda: agather(*[Box.aobjects.get(id=next_box_id()) for _ in range(options["concurrency"])]),
+                DJANGO_ASYNC: native and (lambda: asyncio.gather(*[Box.objects.aget(id=next_box_id()) for _ in range(options["concurrency"])])),
+                DJANGO_SYNC: lambda: [Box.objects.get(id=next_box_id()) for _ in range(options["concurrency"])],
+            }),
+        ])
+        if options["only"]:
+            cases = [case for case in cases if case.name.startswith(tuple(options["only"]))]
+        return cases
+
+    @staticmethod
+    async def aiterate(iterable) -> int:
+        count = 0
+        async for _ in iterable:
+            count += 1
+        return count
+
+    @staticmethod
+    async def m2m(manager, toppings) -> None:
+        await manager.add(*toppings)
+        await manager.set([])
+
+    @staticmethod
+    async def native_m2m(manager, toppings) -> None:
+        await manager.aadd(*toppings)
+        await manager.aset([])
+
+    def run_cases(self, cases: List[Case], options) -> List[Result]:
+        results = []
+        for case in cases:
+            for variant, func in case.variants.items():
+                if not func:
+                    reason = "requires aiosqlite" if variant == ASGIMOD_NATIVE else f"not supported by Django {django.get_version()}"
+                    self.stderr.write(f"Skipping {case.name} {variant}: {reason}")
+                    continue
+                self.stderr.write(f"Running {case.name} {variant} ...")
+                if variant == DJANGO_SYNC:
+                    samples, peak_memory = self.measure(func, options["budget"], options["max_ops"])
+                elif variant == ASGIMOD_NATIVE:
+                    # NOTE: SAME QUERIES AS THE THREAD PATH, EXECUTED BY THE NATIVE ASYNC ENGINE.
+                    with override_settings(ASGIMOD={**settings.ASGIMOD, "DRIVERS": {"default": "asgimod.engines.SQLiteDriver"}}):
+                        samples, peak_memory = asyncio.run(self.ameasure_native(func, options["budget"], options["max_ops"]))
+                else:
+                    samples, peak_memory = asyncio.run(self.ameasure(func, options["budget"], options["max_ops"]))
+                total = sum(samples)
+                results.append(Result(
+                    case.name, variant, len(samples), len(samples) / total, len(samples) * case.items / total,
+                    percentile(samples, 0.5), percentile(samples, 0.99), peak_memory,
+                ))
+        return results
+
+    @staticmethod
+    def measure(func: Callable[[], Any], budget: float, max_ops: int):
+        func()
+        samples = []
+        deadline = time.perf_counter() + budget
+        while len(samples) < max_ops and (len(samples) < MIN_OPS or time.perf_counter() < deadline):
+            start = time.perf_counter()
+            func()
+            samples.append(time.perf_counter() - start)
+        # CAUTION: tracemalloc slows allocations down, memory is measured on a separate operation
+        tracemalloc.start()
+        try:
+            func()
+            return samples, tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    @staticmethod
+    async def ameasure(func: Callable[[], Any], budget: float, max_ops: int):
+        await func()
+        samples = []
+        deadline = time.perf_counter() + budget
+        while len(samples) < max_ops and (len(samples) < MIN_OPS or time.perf_counter() < deadline):
+            start = time.perf_counter()
+            await func()
+            samples.append(time.perf_counter() - start)
+        tracemalloc.start()
+        try:
+            await func()
+            return samples, tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    @classmethod
+    async def ameasure_native(cls, func: Callable[[], Any], budget: float, max_ops: int):
+        try:
+            return await cls.ameasure(func, budget, max_ops)
+        finally:
+            await engines.close_drivers()
+
+    def report(self, results: List[Result]) -> None:
+        header = f"{'case':<20} {'variant':<16} {'ops':>6} {'ops/s':>10} {'items/s':>12} {'p50 ms':>10} {'p99 ms':>10} {'peak MiB':>9}"
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+        for result in results:
+            self.stdout.write(
+                f"{result.case:<20} {result.variant:<16} {result.ops:>6} {result.ops_per_second:>10.1f} {result.items_per_second:>12.1f} "
+                f"{result.p50 * 1000:>10.3f} {result.p99 * 1000:>10.3f} {result.peak_memory / 2 ** 20:>9.2f}"
+            )
+
+    def compare(self, results: List[Result], path: str, tolerance: float) -> None:
+        with open(path) as f:
+            baseline = {(result["case"], result["variant"]): result for result in json.load(f)}
+        regressions = []
+        for result in results:
+            previous: Optional[dict] = baseline.get((result.case, result.variant))
+            if previous is None:
+                continue
+            ratio = result.p50 / previous["p50"]
+            self.stdout.write(f"{result.case:<20} {result.variant:<16} p50 x{ratio:.2f}")
+            if ratio > 1 + tolerance:
+                regressions.append(f"{result.case} {result.variant} (x{ratio:.2f})")
+        if regressions:
+            raise CommandError("p50 regressions over %d%%: %s" % (tolerance * 100, ", ".join(regressions)))
@@ -23,3 +23,7 @@ class Pizza(AsyncMixin, models.Model):
     toppings = models.ManyToManyField(Topping)
     box = models.ForeignKey(Box, null=True, on_delete=models.SET_NULL)
     price = models.OneToOneField(Price, on_delete=models.CASCADE)
+
+
+class Order(AsyncMixin, models.Model):
+    created = models.DateTimeField()
@@ -1,9 +1,49 @@
+import array
+import asyncio
+import contextvars
+import pickle
+import threading
+import time
+import unittest
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal
+from unittest import mock
 
-from django.test import TestCase
-from asgimod.sync import async_to_sync
+from django.core.exceptions import ImproperlyConfigured
+from django.db import IntegrityError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.db.models import F, Sum
+from django.db.models.signals import m2m_changed, post_delete, pre_save
+from django.test.utils import CaptureQueriesContext
+from asgimod import buffers, columns as columns_module, engines, executors, loaders, routers, slow_queries
+from asgimod.buffers import buffer_writes
+from asgimod.db import AsyncManyToManyRelatedQuerySet, AsyncManyToOneRelatedQuerySet, agather, aprefetch
+from asgimod.executors import batch_calls, close_executors, database_sync_to_async, get_executor, thread_sensitive
+from asgimod.identity import IdentityMapMiddleware, get_identity_map, identity_map
+from asgimod.instrumentation import CallbackSink, PrometheusSink, add_sink, remove_sink
+from asgimod.limits import Limiter, Overloaded, get_limiter, priority
+from asgimod.loaders import batch_relations
+from asgimod.routers import use_primary
+from asgimod.sync import async_to_sync, sync_to_async
+from asgimod.transaction import aatomic
 
-from .models import Pizza, Topping, Price, Box
+from .models import Pizza, Topping, Price, Box, Order
+
+
+@asynccontextmanager
+async def capture_queries():
+    # NOTE: CONNECTIONS ARE THREAD LOCAL, QUERIES ARE CAPTURED ON THE DATABASE THREAD.
+    context = CaptureQueriesContext(connection)
+    await sync_to_async(context.__enter__)()
+    try:
+        yield context
+    finally:
+        await sync_to_async(context.__exit__)(None, None, None)
+
+
+async def count_queries(context: CaptureQueriesContext) -> int:
+    return await sync_to_async(len)(context)
 
 
 class AsyncTestCase(TestCase):
@@ -235,6 +275,34 @@ class AsyncTestCase(TestCase):
         self.assertEqual(prices_highest.amount, Decimal("39.99"))
         prices_lowest = await Price.aobjects.order_by("-amount")[-1]
         self.assertEqual(prices_lowest.amount, Decimal("9.99"))
+        price_latest = await Price.aobjects.all()[-1]
+        self.assertEqual(price_latest.id, 3)
+        price_med = await Price.aobjects.order_by("amount")[:2][-1]
+        self.assertEqual(price_med.amount, Decimal("29.99"))
+        price_med = await Price.aobjects.order_by("amount")[1:][-2]
+        self.assertEqual(price_med.amount, Decimal("29.99"))
+        currency = await Price.aobjects.order_by("id").values_list("currency", flat=True)[-1]
+        self.assertEqual(currency, "eur")
+        with self.assertRaises(IndexError):
+            await Price.aobjects.all()[3]
+        with self.assertRaises(IndexError):
+            await Price.aobjects.all()[-4]
+        with self.assertRaises(IndexError):
+            await Price.aobjects.all()[:2][-3]
+
+        # CASE slicing with steps
+        prices = await Price.aobjects.order_by("amount")[::2]
+        self.assertEqual([price.amount for price in prices], [Decimal("9.99"), Decimal("39.99")])
+        prices = await Price.aobjects.order_by("amount")[1:3:1]
+        self.assertEqual([price.amount for price in prices], [Decimal("29.99"), Decimal("39.99")])
+
+        # CASE aiter
+        amounts = []
+        async for price in Price.aobjects.order_by("amount"):
+            amounts.append(price.amount)
+        self.assertEqual(amounts, [Decimal("9.99"), Decimal("29.99"), Decimal("39.99")])
+        async for box in Box.aobjects.prefetch_related("pizza_set"):
+            self.assertEqual(box.pizza_set.all()[0].name, "Thicc Pizza")
 
         # CASE len
         try:
@@ -256,6 +324,77 @@ class AsyncTestCase(TestCase):
         # CASE str
         self.assertIsInstance(str(Price.aobjects.all()), str)
 
+    @async_to_sync
+    async def test_chunks(self):
+        # CASE achunks
+        chunks = []
+        async for chunk in Price.aobjects.order_by("amount").achunks(chunk_size=2):
+            chunks.append([price.amount for price in chunk])
+        self.assertEqual(chunks, [[Decimal("9.99"), Decimal("29.99")], [Decimal("39.99")]])
+        chunks = []
+        async for chunk in Price.aobjects.values_list("id", flat=True).order_by("id").achunks(chunk_size=1, read_ahead=True):
+            chunks.append(chunk)
+        self.assertEqual(chunks, [[1], [2], [3]])
+        chunks = []
+        async for chunk in Price.aobjects.filter(currency="cny").achunks():
+            chunks.append(chunk)
+        self.assertEqual(chunks, [])
+
+        # CASE achunks break
+        async for chunk in Price.aobjects.all().achunks(chunk_size=1, read_ahead=True):
+            self.assertEqual(len(chunk), 1)
+            break
+        self.assertEqual(await Price.aobjects.count(), 3)
+
+        # CASE iterator
+        names = []
+        async for topping in Topping.aobjects.order_by("id").iterator(chunk_size=2):
+            names.append(topping.name)
+        self.assertEqual(names, ["Bacon", "Mushroom", "Random"])
+        names = []
+        async for name in Topping.aobjects.filter(id__gt=1).values_list("name", flat=True).order_by("-id").iterator():
+            names.append(name)
+        self.assertEqual(names, ["Random", "Mushroom"])
+
+        # CASE raw
+        names = [topping.name async for topping in Topping.aobjects.raw("SELECT * FROM testapp_topping ORDER BY id")]
+        self.assertEqual(names, ["Bacon", "Mushroom", "Random"])
+        chunks = [[topping.id for topping in chunk] async for chunk in Topping.aobjects.raw("SELECT * FROM testapp_topping ORDER BY id").achunks(chunk_size=2)]
+        self.assertEqual(chunks, [[1, 2], [3]])
+
+        # CASE achunks invalid chunk_size
+        with self.assertRaises(ValueError):
+            async for chunk in Price.aobjects.achunks(chunk_size=0):
+                pass
+
+    @async_to_sync
+    async def test_result_cache(self):
+        # CASE eval cache
+        prices_qs = Price.aobjects.order_by("amount")
+        async with capture_queries() as queries:
+            prices = await prices_qs.eval()
+            self.assertEqual(len(prices), 3)
+            self.assertEqual(await prices_qs.eval(), prices)
+            amounts = [price.amount async for price in prices_qs]
+            self.assertEqual(amounts, [Decimal("9.99"), Decimal("29.99"), Decimal("39.99")])
+            self.assertEqual((await prices_qs[-1]).amount, Decimal("39.99"))
+            self.assertEqual(await prices_qs.count(), 3)
+            self.assertEqual(await prices_qs.exists(), True)
+        self.assertEqual(await count_queries(queries), 1)
+
+        # CASE refresh
+        await Price.aobjects.create(amount=Decimal("1.99"), currency="cny")
+        self.assertEqual(await prices_qs.count(), 3)
+        self.assertIs(prices_qs.refresh(), prices_qs)
+        self.assertEqual(await prices_qs.count(), 4)
+        self.assertEqual(len(await prices_qs.eval()), 4)
+
+        # CASE update invalidates cache
+        cny_prices_qs = Price.aobjects.filter(currency="cny")
+        self.assertEqual(len(await cny_prices_qs.eval()), 1)
+        await cny_prices_qs.update(currency="jpy")
+        self.assertEqual(await cny_prices_qs.exists(), False)
+
     @async_to_sync
     async def test_operator_methods(self):
         # CASE or (|)
@@ -355,3 +494,929 @@ class AsyncTestCase(TestCase):
         self.assertEqual(await weird_pizza.atoppings.all().count(), 0)
 
         # NOTE: THERE ARE UNCOVERED TEST CASES PENDING TO BE ADDED.
+
+    @async_to_sync
+    async def test_single_flight(self):
+        # CASE concurrent identical reads
+        boxes_qs = Box.aobjects.single_flight()
+        async with capture_queries() as queries:
+            boxes = await asyncio.gather(*[boxes_qs.get(id=1) for _ in range(5)])
+        self.assertEqual(await count_queries(queries), 1)
+        self.assertEqual(len(set(map(id, boxes))), 5)
+        for box in boxes:
+            self.assertEqual(box, boxes[0])
+            self.assertEqual(box.name, "Medium")
+
+        # CASE chaining
+        prices_qs = Price.aobjects.single_flight().filter(currency="usd")
+        async with capture_queries() as queries:
+            results = await asyncio.gather(
+                prices_qs.count(), prices_qs.count(),
+                prices_qs.exists(), prices_qs.exists(),
+                prices_qs.order_by("amount").first(), prices_qs.order_by("amount").first(),
+                prices_qs.aggregate(total=Sum("amount")), prices_qs.aggregate(total=Sum("amount")),
+            )
+        self.assertEqual(await count_queries(queries), 4)
+        self.assertEqual(results[:4], [2, 2, True, True])
+        self.assertEqual(results[4].amount, Decimal("9.99"))
+        self.assertEqual(results[6], {"total": Decimal("49.98")})
+        self.assertEqual(results[7], {"total": Decimal("49.98")})
+
+        # CASE followers get their own instances
+        boxes_lists = await asyncio.gather(boxes_qs.filter(id=1).eval(), boxes_qs.filter(id=1).eval())
+        prices_dicts = await asyncio.gather(Price.aobjects.single_flight().in_bulk([1]), Price.aobjects.single_flight().in_bulk([1]))
+        boxes_lists[1][0].name = "Mutated"
+        prices_dicts[1][1].amount = Decimal("0")
+        self.assertEqual((boxes_lists[0][0].name, prices_dicts[0][1].amount), ("Medium", Decimal("9.99")))
+
+        # CASE distinct reads
+        async with capture_queries() as queries:
+            boxes = await asyncio.gather(boxes_qs.get(id=1), boxes_qs.get(name="Medium"), Box.aobjects.get(id=1))
+        self.assertEqual(await count_queries(queries), 3)
+        async with capture_queries() as queries:
+            await boxes_qs.get(id=1)
+            await boxes_qs.get(id=1)
+        self.assertEqual(await count_queries(queries), 2)
+
+        # CASE errors are shared
+        results = await asyncio.gather(*[boxes_qs.get(id=100) for _ in range(2)], return_exceptions=True)
+        for result in results:
+            self.assertIsInstance(result, Box.DoesNotExist)
+
+    @async_to_sync
+    async def test_prefetch(self):
+        pizza = await Pizza.aobjects.get(id=1)
+        bacon = await Topping.aobjects.get(id=1)
+        await pizza.atoppings.add(bacon)
+        boxes = await Box.aobjects.all().eval()
+        pizzas = await Pizza.aobjects.all().eval()
+
+        # CASE aprefetch
+        async with capture_queries() as queries:
+            self.assertEqual(await aprefetch(boxes, "pizza_set"), boxes)
+            self.assertEqual(await aprefetch(pizzas, "toppings", "box"), pizzas)
+            self.assertEqual(await aprefetch([]), [])
+        self.assertEqual(await count_queries(queries), 3)
+
+        # CASE prefetched related managers
+        box, pizza = boxes[0], pizzas[0]
+        async with capture_queries() as queries:
+            self.assertEqual(await box.apizza_set.all().eval(), [pizza])
+            self.assertEqual(await box.apizza_set.count(), 1)
+            self.assertEqual([p async for p in box.apizza_set.all()], [pizza])
+            self.assertEqual(await pizza.atoppings.all().exists(), True)
+            self.assertEqual(await pizza.atoppings.all()[0], bacon)
+        self.assertEqual(await count_queries(queries), 0)
+        self.assertEqual(await pizza.atoppings.filter(name="Mushroom").exists(), False)
+
+        # CASE writes on prefetched related managers
+        toppings = pizza.atoppings
+        await toppings.remove(bacon)
+        self.assertEqual(await toppings.count(), 0)
+        self.assertEqual(await pizza.atoppings.all().exists(), False)
+
+    @async_to_sync
+    async def test_batch_relations(self):
+        medium_box = await Box.aobjects.get(id=1)
+        large_box = await Box.aobjects.create(id=2, name="Large")
+        for i, box in [(2, medium_box), (3, large_box), (4, None)]:
+            price = await Price.aobjects.create(id=i + 2, amount=Decimal("1.99"))
+            await Pizza.aobjects.create(id=i, name=f"Pizza {i}", price=price, box=box)
+        pizzas = await Pizza.aobjects.order_by("id").eval()
+        prices = await Price.aobjects.order_by("id").eval()
+
+        # CASE forward many-to-one and one-to-one rel
+        with batch_relations():
+            async with capture_queries() as queries:
+                boxes = await asyncio.gather(*[pizza.abox for pizza in pizzas])
+                pizza_prices = await asyncio.gather(*[pizza.aprice for pizza in pizzas])
+            self.assertEqual(await count_queries(queries), 2)
+            self.assertEqual(boxes, [medium_box, medium_box, large_box, None])
+            self.assertEqual([price.id for price in pizza_prices], [1, 4, 5, 6])
+            async with capture_queries() as queries:
+                self.assertEqual(await pizzas[2].abox, large_box)
+                self.assertEqual(await pizza_prices[0].apizza, pizzas[0])
+            self.assertEqual(await count_queries(queries), 0)
+
+        # CASE reverse one-to-one rel
+        with batch_relations():
+            async with capture_queries() as queries:
+                results = await asyncio.gather(*[price.apizza for price in prices], return_exceptions=True)
+            self.assertEqual(await count_queries(queries), 1)
+            self.assertEqual(results[0], pizzas[0])
+            self.assertIsInstance(results[1], Price.pizza.RelatedObjectDoesNotExist)
+            self.assertIsInstance(results[2], Price.pizza.RelatedObjectDoesNotExist)
+            self.assertEqual(results[3:], pizzas[1:])
+
+        # CASE waiting loads cancelled with their batch, before and while it runs
+        never_loaded = lambda func, using: lambda *args: asyncio.Event().wait()
+        for started in (False, True):
+            pizzas = await Pizza.aobjects.order_by("id").eval()
+            with batch_relations(), mock.patch.object(loaders, "database_sync_to_async", never_loaded):
+                loader = loaders._relation_loader.get()
+                waiting = asyncio.gather(*[pizza.abox for pizza in pizzas[:2]])
+                while not loader._tasks:
+                    await asyncio.sleep(0)
+                if started:
+                    await asyncio.sleep(0)
+                for task in list(loader._tasks):
+                    task.cancel()
+                with self.assertRaises(asyncio.CancelledError):
+                    await asyncio.wait_for(waiting, 1)
+
+        # CASE without batching
+        pizza = await Pizza.aobjects.get(id=3)
+        self.assertEqual(await pizza.abox, large_box)
+
+    @async_to_sync
+    async def test_cache(self):
+        # CASE not configured
+        with self.assertRaises(ImproperlyConfigured):
+            await Box.aobjects.cached().get(id=1)
+
+        with override_settings(ASGIMOD={"CACHE": {"BACKEND": "asgimod.cache.LocMemBackend", "OPTIONS": {"maxsize": 8}}}):
+            # CASE cache hits
+            prices_qs = Price.aobjects.cached().filter(currency="usd")
+            async with capture_queries() as queries:
+                for _ in range(2):
+                    self.assertEqual(await prices_qs.count(), 2)
+                    self.assertEqual(await prices_qs.aggregate(total=Sum("amount")), {"total": Decimal("49.98")})
+                    self.assertEqual(len(await prices_qs.order_by("id").eval()), 2)
+                    self.assertEqual(list(await prices_qs.in_bulk([1, 3])), [1])
+            self.assertEqual(await count_queries(queries), 4)
+            box, cached_box = await Box.aobjects.cached().get(id=1), await Box.aobjects.cached().get(id=1)
+            self.assertIsNot(box, cached_box)
+            self.assertEqual(box.name, cached_box.name)
+
+            # CASE invalidation on save and delete
+            box.name = "Small"
+            await box.asave()
+            self.assertEqual((await Box.aobjects.cached().get(id=1)).name, "Small")
+            self.assertEqual(await Pizza.aobjects.cached().filter(box__name="Small").count(), 1)
+            await Box.aobjects.create(id=2, name="Small")
+            self.assertEqual(await Box.aobjects.cached().filter(name="Small").count(), 2)
+            await (await Box.aobjects.get(id=2)).adelete()
+            self.assertEqual(await Box.aobjects.cached().filter(name="Small").count(), 1)
+
+            # CASE invalidation on bulk writes
+            await Price.aobjects.filter(id=1).update(currency="eur")
+            self.assertEqual(await prices_qs.count(), 1)
+            price = await Price.aobjects.get(id=1)
+            price.currency = "usd"
+            await Price.aobjects.bulk_update([price], ["currency"])
+            self.assertEqual(await prices_qs.count(), 2)
+            await Price.aobjects.bulk_create([Price(id=4, amount=Decimal("1.00"))])
+            self.assertEqual(await prices_qs.count(), 3)
+            self.assertEqual(await Pizza.aobjects.cached().filter(box__isnull=True).count(), 0)
+            await (await Box.aobjects.get(id=1)).apizza_set.clear()
+            self.assertEqual(await Pizza.aobjects.cached().filter(box__isnull=True).count(), 1)
+
+            # CASE ttl
+            boxes_qs = Box.aobjects.cached(ttl=0.05)
+            self.assertEqual(await boxes_qs.count(), 1)
+            async with capture_queries() as queries:
+                await boxes_qs.count()
+                await asyncio.sleep(0.1)
+                await boxes_qs.count()
+            self.assertEqual(await count_queries(queries), 1)
+
+            # CASE receivers connected only for the models of cached tables
+            self.assertTrue(post_delete.has_listeners(Box))
+            self.assertFalse(post_delete.has_listeners(Topping))
+        self.assertFalse(post_delete.has_listeners(Box))
+
+        # CASE receivers connected for the configured models
+        with override_settings(ASGIMOD={"CACHE": {"BACKEND": "asgimod.cache.LocMemBackend", "MODELS": ["testapp.Pizza"]}}):
+            self.assertEqual(await Box.aobjects.cached().count(), 1)
+            self.assertTrue(post_delete.has_listeners(Pizza))
+            self.assertTrue(m2m_changed.has_listeners(Pizza.toppings.through))
+            self.assertFalse(post_delete.has_listeners(Topping))
+        self.assertFalse(post_delete.has_listeners(Pizza))
+
+    @async_to_sync
+    async def test_agather(self):
+        # CASE one thread hop
+        prices_qs = Price.aobjects.filter(currency="usd")
+        with mock.patch.object(executors, "sync_to_async", wraps=executors.sync_to_async) as hops:
+            count, prices, aggregate, exists, box, pizza = await agather(
+                prices_qs.count(),
+                prices_qs.order_by("id")[:1],
+                prices_qs.aggregate(total=Sum("amount")),
+                prices_qs.filter(amount__gt=100).exists(),
+                Box.aobjects.get(id=1),
+                Pizza.aobjects.first(),
+            )
+        self.assertEqual(hops.call_count, 1)
+        self.assertEqual(count, 2)
+        self.assertEqual([price.id for price in prices], [1])
+        self.assertEqual(aggregate, {"total": Decimal("49.98")})
+        self.assertFalse(exists)
+        self.assertEqual(box.name, "Medium")
+        self.assertEqual(pizza.name, "Thicc Pizza")
+
+        # CASE errors are per call
+        results = await agather(Box.aobjects.get(id=100), Box.aobjects.count(), return_exceptions=True)
+        self.assertIsInstance(results[0], Box.DoesNotExist)
+        self.assertEqual(results[1], 1)
+        with self.assertRaises(Box.DoesNotExist):
+            await agather(Box.aobjects.get(id=100), Box.aobjects.count())
+
+        # CASE follow-up calls are batched per loop iteration
+        async def get_box(pizza_id):
+            pizza = await Pizza.aobjects.get(id=pizza_id)
+            return await pizza.abox
+
+        with mock.patch.object(executors, "sync_to_async", wraps=executors.sync_to_async) as hops:
+            with batch_calls():
+                boxes = await asyncio.gather(get_box(1), get_box(1))
+        self.assertEqual(hops.call_count, 2)
+        self.assertEqual([box.name for box in boxes], ["Medium", "Medium"])
+
+    @async_to_sync
+    async def test_buffer_writes(self):
+        # CASE coalesced updates and creates
+        prices = await Price.aobjects.order_by("id").eval()
+        for price in prices:
+            price.amount += 1
+        stale_price = await Price.aobjects.get(id=1)
+        stale_price.amount = Decimal("0.00")
+        prices[0].currency = "gbp"
+        with mock.patch.object(executors, "sync_to_async", wraps=executors.sync_to_async) as hops:
+            async with buffer_writes(max_delay=0.01):
+                await asyncio.gather(
+                    stale_price.asave(update_fields=["amount"]),
+                    *[price.asave(update_fields=["amount"]) for price in prices],
+                    prices[0].asave(update_fields=["currency"]),
+                    Box(name="Small").asave(),
+                    Box(name="Large").asave(),
+                )
+        self.assertEqual(hops.call_count, 1)
+        self.assertEqual(await Price.aobjects.order_by("id").values_list("amount", "currency").eval(), [
+            (Decimal("10.99"), "gbp"), (Decimal("40.99"), "usd"), (Decimal("30.99"), "eur"),
+        ])
+        self.assertEqual(await Box.aobjects.filter(name__in=["Small", "Large"]).count(), 2)
+
+        # CASE flush on size and delay
+        async with buffer_writes(max_delay=60, max_size=2):
+            boxes = [Box(name="Tiny"), Box(name="Tiny")]
+            await asyncio.gather(*[box.asave() for box in boxes])
+        async with buffer_writes(max_delay=0):
+            await Box(name="Tiny").asave()
+        self.assertEqual(await Box.aobjects.filter(name="Tiny").count(), 3)
+
+        # CASE errors are per caller
+        box = Box(id=1, name="Duplicate")
+        async with buffer_writes():
+            results = await asyncio.gather(box.asave(), Box(name="Huge").asave(), return_exceptions=True)
+        self.assertIsInstance(results[0], IntegrityError)
+        self.assertIsNone(results[1])
+        self.assertEqual(await Box.aobjects.filter(name="Huge").count(), 1)
+        self.assertEqual((await Box.aobjects.get(id=1)).name, "Medium")
+
+        # CASE models with save signal receivers are saved one by one
+        saved = []
+        receiver = lambda instance, **kwargs: saved.append(instance.name)
+        pre_save.connect(receiver, sender=Box)
+        try:
+            with mock.patch.object(executors, "sync_to_async", wraps=executors.sync_to_async) as hops:
+                async with buffer_writes():
+                    await asyncio.gather(Box(name="Signal").asave(), Box(name="Signal").asave())
+            self.assertEqual(hops.call_count, 2)
+            self.assertEqual(saved, ["Signal", "Signal"])
+        finally:
+            pre_save.disconnect(receiver, sender=Box)
+        self.assertTrue(buffers.can_bulk_save(Box))
+
+    @async_to_sync
+    async def test_bulk_create_stream(self):
+        produced = []
+
+        async def produce(count, fail=False):
+            for i in range(count):
+                await asyncio.sleep(0)
+                produced.append(i)
+                yield Topping(name=f"Topping {i}")
+            if fail:
+                raise ValueError
+
+        # CASE pipelined batches
+        with mock.patch.object(executors, "sync_to_async", wraps=executors.sync_to_async) as hops:
+            self.assertEqual(await Topping.aobjects.bulk_create_stream(produce(25), batch_size=10), 25)
+        self.assertEqual(hops.call_count, 3)
+        self.assertEqual(await Topping.aobjects.filter(name__startswith="Topping").count(), 25)
+        self.assertEqual(await Topping.aobjects.bulk_create_stream([Topping(name="Cheese")], batch_size=10), 1)
+        with self.assertRaises(ValueError):
+            await Topping.aobjects.bulk_create_stream([], batch_size=0)
+
+        # CASE producer errors
+        await Topping.aobjects.filter(name__startswith="Topping").delete()
+        with self.assertRaises(ValueError):
+            await Topping.aobjects.bulk_create_stream(produce(20, fail=True), batch_size=10, max_in_flight=1)
+        self.assertEqual(await Topping.aobjects.filter(name__startswith="Topping").count(), 20)
+
+    @async_to_sync
+    async def test_limits(self):
+        # CASE priorities
+        limiter = Limiter(1, queue_size=3)
+        await limiter.acquire()
+        order = []
+
+        async def call(name, priority):
+            await limiter.acquire(priority)
+            order.append(name)
+            limiter.release()
+
+        tasks = [asyncio.ensure_future(call(name, priority)) for name, priority in [("batch", 1), ("interactive", 0), ("batch2", 1)]]
+        await asyncio.sleep(0)
+        with self.assertRaises(Overloaded):
+            await limiter.acquire()
+        limiter.release()
+        await asyncio.gather(*tasks)
+        self.assertEqual(order, ["interactive", "batch", "batch2"])
+        self.assertEqual((limiter._active, limiter._queued), (0, 0))
+
+        # CASE queue timeout
+        await limiter.acquire()
+        with self.assertRaises(Overloaded):
+            await limiter.acquire(timeout=0.01)
+        limiter.release()
+        self.assertEqual((limiter._active, limiter._queued), (0, 0))
+
+        # CASE per alias settings
+        with override_settings(ASGIMOD={"MAX_CONCURRENCY": {"default": 1}, "MAX_QUEUE": 2}):
+            results = await asyncio.gather(*[Box.aobjects.count() for _ in range(4)], return_exceptions=True)
+            self.assertEqual(results[:3], [1, 1, 1])
+            self.assertIsInstance(results[3], Overloaded)
+            with priority("batch"):
+                self.assertEqual(await Box.aobjects.count(), 1)
+        with self.assertRaises(ValueError):
+            with priority("urgent"):
+                pass
+
+    @async_to_sync
+    async def test_timeout(self):
+        slow_qs = Box.aobjects.extra(where=["(WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < 20000000) SELECT count(*) FROM c) > 0"])
+
+        # CASE statement interrupted on timeout
+        start = time.monotonic()
+        with self.assertRaises(asyncio.TimeoutError):
+            await slow_qs.timeout(0.05).count()
+        self.assertEqual(await Box.aobjects.timeout(1).count(), 1)
+        self.assertLess(time.monotonic() - start, 2)
+
+        # CASE statement interrupted on cancellation
+        start = time.monotonic()
+        task = asyncio.ensure_future(slow_qs.eval())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertEqual(await Box.aobjects.count(), 1)
+        self.assertLess(time.monotonic() - start, 2)
+
+    @async_to_sync
+    async def test_rows(self):
+        # CASE tuples
+        prices_qs = Price.aobjects.order_by("id")
+        self.assertEqual(await prices_qs.rows("id", "amount").eval(), [(1, Decimal("9.99")), (2, Decimal("39.99")), (3, Decimal("29.99"))])
+        self.assertEqual(await prices_qs.rows().filter(currency="eur").eval(), [(3, Decimal("29.99"), "eur")])
+        self.assertEqual(await prices_qs.rows("id").filter(id__in=[]).eval(), [])
+        self.assertEqual([row async for row in prices_qs.rows("currency").iterator()], [("usd",), ("usd",), ("eur",)])
+
+        # CASE named rows
+        rows = await prices_qs.rows("id", "currency", named=True).filter(amount__gt=10).eval()
+        self.assertEqual([(row.id, row.currency) for row in rows], [(2, "usd"), (3, "eur")])
+        self.assertEqual(rows[0].as_dict(), {"id": 2, "currency": "usd"})
+        self.assertEqual(tuple(rows[1]), (3, "eur"))
+        self.assertEqual(pickle.loads(pickle.dumps(rows[0])), rows[0])
+        self.assertNotEqual(rows[0], rows[1])
+        self.assertIs(type(rows[0]), type(rows[1]))
+        with self.assertRaises(AttributeError):
+            rows[0].amount = 1
+
+        # CASE annotations and converted annotations
+        self.assertEqual([tuple(row) async for row in Pizza.aobjects.annotate(box_name=F("box__name")).rows("name", "box_name", named=True)], [("Thicc Pizza", "Medium")])
+        self.assertEqual(await Price.aobjects.filter(id=1).annotate(double=F("amount") * 2).rows("double").eval(), [(Decimal("19.98"),)])
+
+    @async_to_sync
+    async def test_to_columns(self):
+        prices_qs = Price.aobjects.order_by("id")
+        if columns_module.numpy is None:
+            columns = await prices_qs.to_columns("currency", "amount", "id", chunk_size=2)
+            self.assertEqual(list(columns), ["currency", "amount", "id"])
+            self.assertEqual(columns["amount"], [Decimal("9.99"), Decimal("39.99"), Decimal("29.99")])
+            self.assertEqual(columns["id"], array.array("q", [1, 2, 3]))
+            self.assertEqual(columns["currency"], ["usd", "usd", "eur"])
+        else:
+            columns = await prices_qs.to_columns("currency", "amount", "id", chunk_size=2)
+            self.assertEqual(columns["amount"].tolist(), [Decimal("9.99"), Decimal("39.99"), Decimal("29.99")])
+            self.assertEqual(columns["id"].tolist(), [1, 2, 3])
+            self.assertEqual(columns["currency"].tolist(), ["usd", "usd", "eur"])
+
+        # CASE dtypes, NULL values and annotations
+        columns = await prices_qs.to_columns("amount", dtypes={"amount": "d" if columns_module.numpy is None else "float64"})
+        self.assertEqual(list(columns["amount"]), [9.99, 39.99, 29.99])
+        with mock.patch.object(columns_module, "numpy", None):
+            with self.assertRaisesRegex(ValueError, "'amount'.*'float64'"):
+                await prices_qs.to_columns("amount", dtypes={"amount": "float64"})
+        await Pizza.aobjects.create(name="Boxless", price=await Price.aobjects.get(id=2))
+        columns = await Pizza.aobjects.order_by("id").to_columns("box", "price")
+        self.assertEqual(list(columns["box"]), [1, None])
+        self.assertEqual(list(columns["price"]), [1, 2])
+        columns = await Price.aobjects.values("currency").annotate(total=Sum("amount")).order_by("currency").to_columns()
+        self.assertEqual(list(columns["currency"]), ["eur", "usd"])
+        self.assertEqual(list(columns["total"]), [Decimal("29.99"), Decimal("49.98")])
+        self.assertEqual(list((await prices_qs.none().to_columns("id"))["id"]), [])
+
+    @async_to_sync
+    async def test_paginate(self):
+        await Price.aobjects.bulk_create([Price(id=4, amount=Decimal("29.99")), Price(id=5, amount=Decimal("9.99"))])
+
+        # CASE pages
+        page = await Price.aobjects.paginate("-amount", limit=2)
+        self.assertEqual([price.id for price in page.items], [2, 4])
+        self.assertTrue(page.has_next)
+        async with capture_queries() as queries:
+            page = await Price.aobjects.paginate("-amount", after=page.next_cursor, limit=2)
+        self.assertEqual([price.id for price in page.items], [3, 5])
+        self.assertNotIn("OFFSET", await sync_to_async(lambda: queries.captured_queries[0]["sql"])())
+        page = await Price.aobjects.paginate("-amount", after=page.next_cursor, limit=2)
+        self.assertEqual(([price.id for price in page.items], page.next_cursor), ([1], None))
+        pages = [[price.id for price in page.items] async for page in Price.aobjects.filter(currency="usd").pages("amount", "-id", limit=1)]
+        self.assertEqual(pages, [[5], [1], [4], [2]])
+        pages = [[price["id"] for price in page.items] async for page in Price.aobjects.values("id", "amount").order_by("amount").pages(limit=3)]
+        self.assertEqual(pages, [[1, 5, 3], [4, 2]])
+
+        # CASE datetimes within the same millisecond
+        created = datetime(2024, 1, 1, 12, 0, 0, 123000, tzinfo=timezone.utc)
+        await Order.aobjects.bulk_create([Order(id=i, created=created + timedelta(microseconds=i)) for i in range(1, 6)])
+        pages = [[order.id for order in page.items] async for page in Order.aobjects.pages("created", limit=2)]
+        self.assertEqual(pages, [[1, 2], [3, 4], [5]])
+
+        # CASE invalid cursors
+        with self.assertRaises(ValueError):
+            await Price.aobjects.paginate("-amount", after="invalid", limit=2)
+        with self.assertRaises(ValueError):
+            await Price.aobjects.paginate("amount", after=(await Price.aobjects.paginate("-amount", limit=2)).next_cursor)
+        with self.assertRaises(ValueError):
+            await Pizza.aobjects.paginate("price__amount")
+        with self.assertRaises(ValueError):
+            await Pizza.aobjects.paginate("box")
+        with self.assertRaises(ValueError):
+            await Price.aobjects.values_list("id", "amount").paginate("amount")
+
+    @async_to_sync
+    async def test_instrumentation(self):
+        # CASE callback sink
+        records = []
+        sink = CallbackSink(records.append)
+        add_sink(sink)
+        try:
+            await Price.aobjects.get(id=1)
+            await Price.aobjects.count()
+            await Price.aobjects.filter(currency="usd").eval()
+            with self.assertRaises(Price.DoesNotExist):
+                await Price.aobjects.get(id=100)
+        finally:
+            remove_sink(sink)
+        self.assertEqual([(record.method, record.model, record.using) for record in records], [
+            ("get", "testapp.Price", "default"), ("count", "testapp.Price", "default"),
+            ("eval", "testapp.Price", "default"), ("get", "testapp.Price", "default"),
+        ])
+        self.assertEqual([record.rows for record in records[:3]], [1, 1, 2])
+        self.assertGreater(records[2].bytes, records[0].bytes)
+        self.assertIsInstance(records[3].error, Price.DoesNotExist)
+        for record in records:
+            self.assertGreaterEqual(record.queue_wait, 0)
+            self.assertGreaterEqual(record.exec_time, 0)
+            self.assertGreaterEqual(record.total_time, record.queue_wait + record.exec_time)
+
+        # CASE disabled
+        await Price.aobjects.count()
+        self.assertEqual(len(records), 4)
+
+        # CASE prometheus sink
+        sink = PrometheusSink(buckets=[0.1, 1])
+        with override_settings(ASGIMOD={"SINKS": [sink]}):
+            await Price.aobjects.count()
+            await Price.aobjects.count()
+        metrics = sink.render()
+        self.assertIn('asgimod_calls_total{method="count",model="testapp.Price",using="default",status="ok"} 2', metrics)
+        self.assertIn('asgimod_exec_seconds_bucket{method="count",model="testapp.Price",using="default",le="+Inf"} 2', metrics)
+        self.assertIn('asgimod_rows_total{method="count",model="testapp.Price",using="default"} 2', metrics)
+
+        # CASE queue wait of the concurrency limiter
+        records = []
+        with override_settings(ASGIMOD={"SINKS": [CallbackSink(records.append)], "MAX_CONCURRENCY": {"default": 1}}):
+            limiter = get_limiter("default")
+            await limiter.acquire()
+            task = asyncio.ensure_future(Price.aobjects.count())
+            await asyncio.sleep(0.05)
+            limiter.release()
+            self.assertEqual(await task, 3)
+        self.assertGreaterEqual(records[0].queue_wait, 0.05)
+
+    @async_to_sync
+    async def test_slow_queries(self):
+        # CASE disabled
+        with mock.patch.object(slow_queries, "report") as report:
+            await Price.aobjects.count()
+        report.assert_not_called()
+
+        # CASE slow queries with explain
+        with override_settings(ASGIMOD={"SLOW_QUERIES": {"THRESHOLD": 0}}):
+            with self.assertLogs("asgimod.slow_queries", "WARNING") as logs:
+                await Price.aobjects.filter(currency="usd").count()
+                await Price.aobjects.filter(currency="usd").count()
+                await slow_queries.wait_explains()
+        slow_query = logs.records[0].asgimod_slow_query
+        self.assertIn('"testapp_price"."currency" = %s', slow_query.sql)
+        self.assertEqual(slow_query.params, ("usd",))
+        self.assertIn("test_slow_queries", logs.output[0])
+        plans = [record for record in logs.records if record.getMessage().startswith("Plan of slow query")]
+        self.assertEqual((len(logs.records), len(plans)), (3, 1))
+        self.assertIsNotNone(plans[0].asgimod_slow_query.plan)
+
+        # CASE over the threshold only
+        with override_settings(ASGIMOD={"SLOW_QUERIES": {"THRESHOLD": 60}}):
+            with mock.patch.object(slow_queries, "report") as report:
+                await Price.aobjects.count()
+        report.assert_not_called()
+
+    @async_to_sync
+    async def test_identity_map(self):
+        # CASE get and in_bulk
+        with identity_map():
+            price = await Price.aobjects.get(id=1)
+            async with capture_queries() as queries:
+                self.assertIs(await Price.aobjects.get(pk="1"), price)
+                self.assertIs(await Price.aobjects.all().get(id__exact=1), price)
+                self.assertIs(await Price.aobjects.filter(currency="usd").get(amount=Decimal("9.99")), price)
+                prices = await Price.aobjects.in_bulk([1, 2])
+                self.assertIs(prices[1], price)
+                self.assertIs(await Price.aobjects.get(id=2), prices[2])
+            self.assertEqual(await count_queries(queries), 2)
+            self.assertIsNot(await Price.aobjects.only("id").get(id=1), price)
+        self.assertIsNot(await Price.aobjects.get(id=1), price)
+
+        # CASE relations
+        with identity_map():
+            box = await Box.aobjects.get(id=1)
+            pizza = await Pizza.aobjects.get(id=1)
+            async with capture_queries() as queries:
+                self.assertIs(await pizza.abox, box)
+            self.assertEqual(await count_queries(queries), 0)
+            self.assertIs(await (await Pizza.aobjects.get(id=1)).abox, box)
+            self.assertIs(await Price.aobjects.get(id=1), await pizza.aprice)
+
+        # CASE asave and adelete
+        with identity_map():
+            box = await Box.aobjects.get(id=1)
+            renamed = Box(id=1, name="Renamed")
+            await renamed.asave()
+            self.assertIs(await Box.aobjects.get(id=1), renamed)
+            await renamed.adelete()
+            with self.assertRaises(Box.DoesNotExist):
+                await Box.aobjects.get(id=1)
+
+        # CASE bulk update and delete
+        with identity_map():
+            await Price.aobjects.get(id=2)
+            await Pizza.aobjects.get(id=1)
+            await Price.aobjects.filter(id=2).update(currency="gbp")
+            self.assertEqual((await Price.aobjects.get(id=2)).currency, "gbp")
+            await Price.aobjects.filter(id=1).delete()
+            with self.assertRaises(Price.DoesNotExist):
+                await Price.aobjects.get(id=1)
+            with self.assertRaises(Pizza.DoesNotExist):
+                await Pizza.aobjects.get(id=1)
+
+        # CASE middleware
+        scopes = []
+
+        async def app(scope, receive, send):
+            scopes.append((scope["type"], get_identity_map() is not None))
+
+        await IdentityMapMiddleware(app)({"type": "http"}, None, None)
+        await IdentityMapMiddleware(app)({"type": "websocket"}, None, None)
+        self.assertEqual(scopes, [("http", True), ("websocket", False)])
+
+    @async_to_sync
+    async def test_async_attributes(self):
+        pizza = await Pizza.aobjects.select_related("box", "price").get(id=1)
+        self.assertIn("abox", Pizza.__dict__)
+
+        # CASE loaded values without hops
+        with mock.patch.object(executors, "sync_to_async", wraps=executors.sync_to_async) as hops:
+            self.assertEqual((await pizza.abox).name, "Medium")
+            self.assertEqual((await pizza.aprice).id, 1)
+            self.assertEqual(await pizza.aname, "Thicc Pizza")
+            self.assertIs(await (await pizza.aprice).apizza, pizza)
+            self.assertIsNone(await Pizza(name="Boxless").abox)
+        self.assertEqual(hops.call_count, 0)
+
+        # CASE unloaded values
+        pizza = await Pizza.aobjects.only("id", "box").get(id=1)
+        self.assertEqual(await pizza.aname, "Thicc Pizza")
+        self.assertEqual((await pizza.abox).name, "Medium")
+        self.assertEqual((await (await Price.aobjects.get(id=1)).apizza).id, 1)
+        with self.assertRaises(Price.pizza.RelatedObjectDoesNotExist):
+            await (await Price.aobjects.get(id=2)).apizza
+
+        # CASE related managers
+        self.assertIsInstance(pizza.atoppings, AsyncManyToManyRelatedQuerySet)
+        self.assertIsInstance((await pizza.abox).apizza_set, AsyncManyToOneRelatedQuerySet)
+        self.assertEqual(await (await pizza.abox).apizza_set.count(), 1)
+        with self.assertRaises(AttributeError):
+            pizza.amissing
+
+
+class AsyncRoutingTestCase(TestCase):
+    databases = {"default", "other"}
+
+    def setUp(self) -> None:
+        Box.objects.create(name="Primary")
+        Box.objects.using("other").create(name="Replica")
+
+    @override_settings(DATABASE_ROUTERS=["asgimod.routers.ReplicaRouter"], ASGIMOD={"REPLICAS": {"default": ["other"]}})
+    @async_to_sync
+    async def test_replicas(self):
+        # CASE reads on replicas
+        box = await Box.aobjects.get()
+        self.assertEqual((box.name, box._state.db), ("Replica", "other"))
+        with use_primary():
+            self.assertEqual((await Box.aobjects.get()).name, "Primary")
+        self.assertEqual(await Box.aobjects.using("default").count(), 1)
+
+        # CASE read your writes
+        async def write_then_read():
+            await Box.aobjects.create(name="Written")
+            return await Box.aobjects.count()
+
+        self.assertEqual(await asyncio.ensure_future(write_then_read()), 2)
+        self.assertEqual(await Box.aobjects.count(), 1)
+        price = await Price.aobjects.create(amount=Decimal("1.00"))
+        pizza = await Pizza.aobjects.create(name="Replicated", price=price, box=box)
+        self.assertEqual(await Box.aobjects.count(), 2)
+        self.assertEqual((await pizza.abox).name, "Replica")
+
+    @async_to_sync
+    async def test_fan_out(self):
+        boxes_qs = Box.aobjects.order_by("name").fan_out(["default", "other"])
+        self.assertEqual([box.name for box in await boxes_qs.eval()], ["Primary", "Replica"])
+        self.assertEqual(await boxes_qs.count(), 2)
+        self.assertTrue(await boxes_qs.exists())
+        self.assertFalse(await Box.aobjects.filter(name="Missing").fan_out(["default", "other"]).exists())
+        self.assertEqual(await boxes_qs.results("count"), {"default": 1, "other": 1})
+        self.assertEqual(sorted([box.name async for box in boxes_qs]), ["Primary", "Replica"])
+        with self.assertRaises(Exception):
+            async for box in Box.aobjects.fan_out(["default", "missing"]):
+                pass
+
+
+class AsyncTransactionTestCase(TransactionTestCase):
+    databases = {"default", "other"}
+
+    def tearDown(self) -> None:
+        close_executors()
+
+    @async_to_sync
+    async def test_aatomic(self):
+        # CASE commit
+        async with aatomic():
+            await Box.aobjects.create(id=2, name="Small")
+            box = await Box.aobjects.select_for_update().get(id=2)
+            box.name = "Tiny"
+            await box.asave()
+        self.assertEqual((await Box.aobjects.get(id=2)).name, "Tiny")
+
+        # CASE rollback
+        with self.assertRaises(ValueError):
+            async with aatomic():
+                await Box.aobjects.filter(id=2).update(name="Large")
+                raise ValueError
+        self.assertEqual((await Box.aobjects.get(id=2)).name, "Tiny")
+
+        # CASE savepoints
+        async with aatomic():
+            await Box.aobjects.create(id=3, name="Large")
+            with self.assertRaises(Box.DoesNotExist):
+                async with aatomic():
+                    await Box.aobjects.filter(id=3).delete()
+                    await Box.aobjects.get(id=3)
+            await Box.aobjects.create(id=4, name="Huge")
+        self.assertEqual(await Box.aobjects.filter(id__in=[3, 4]).count(), 2)
+
+        # CASE dedicated thread
+        get_thread_name = lambda: database_sync_to_async(lambda: threading.current_thread().name)()
+        async with aatomic():
+            thread_name = await get_thread_name()
+            self.assertTrue(thread_name.startswith("asgimod-default-pinned"))
+            self.assertNotEqual(await contextvars.Context().run(get_thread_name), thread_name)
+
+        # CASE durable blocks
+        async with aatomic(durable=True):
+            await Box.aobjects.create(id=5, name="Durable")
+        self.assertTrue(await Box.aobjects.filter(id=5).exists())
+        with mock.patch("django.VERSION", (3, 1, 0, "final", 0)):
+            with self.assertRaises(ValueError):
+                async with aatomic(durable=True):
+                    pass
+            async with aatomic():
+                self.assertEqual(await Box.aobjects.filter(id=5).count(), 1)
+
+    @override_settings(DATABASE_ROUTERS=["asgimod.routers.ReplicaRouter"], ASGIMOD={"REPLICAS": {"default": ["other"]}})
+    @async_to_sync
+    async def test_aatomic_replicas(self):
+        # CAUTION: async writes (also of previous tests, propagated by `async_to_sync`) stick reads to the primary
+        routers._written.set(frozenset())
+        await sync_to_async(lambda: (Box.objects.create(name="Primary"), Box.objects.using("other").create(name="Replica")))()
+        self.assertEqual((await Box.aobjects.get()).name, "Replica")
+
+        # CASE locking reads on the primary, within the transaction
+        self.assertEqual(Box.aobjects.select_for_update()._get_db(), "default")
+        with mock.patch.object(executors, "get_executor", wraps=executors.get_executor) as get_executor:
+            async with aatomic():
+                self.assertEqual((await Box.aobjects.select_for_update().get()).name, "Primary")
+        self.assertNotIn(mock.call("other"), get_executor.call_args_list)
+
+
+@override_settings(ASGIMOD={"EXECUTOR": "pool", "POOL_SIZE": 4})
+class AsyncExecutorTestCase(TransactionTestCase):
+    databases = {"default", "other"}
+
+    def tearDown(self) -> None:
+        close_executors()
+
+    @async_to_sync
+    async def test_pool_executor(self):
+        # CASE executor per alias
+        executor = get_executor("default")
+        self.assertIsNotNone(executor)
+        self.assertIs(get_executor("default"), executor)
+        with thread_sensitive():
+            self.assertIsNone(get_executor("default"))
+        with override_settings(ASGIMOD={"EXECUTOR": "pool", "POOL_SIZE": {"default": 2}}):
+            close_executors()
+            self.assertEqual(get_executor("default")._max_workers, 2)
+        with override_settings(ASGIMOD={"EXECUTOR": "threads"}):
+            with self.assertRaises(ImproperlyConfigured):
+                get_executor("default")
+
+        # CASE queries on pool threads
+        thread_names = await asyncio.gather(*[database_sync_to_async(lambda: threading.current_thread().name)() for _ in range(4)])
+        for thread_name in thread_names:
+            self.assertTrue(thread_name.startswith("asgimod-default"))
+        await Topping.aobjects.bulk_create([Topping(name="Bacon"), Topping(name="Mushroom"), Topping(name="Random")])
+        toppings = await asyncio.gather(*[Topping.aobjects.get(name=name) for name in ["Bacon", "Mushroom", "Random"]])
+        self.assertEqual([topping.name for topping in toppings], ["Bacon", "Mushroom", "Random"])
+        self.assertEqual(await Topping.aobjects.count(), 3)
+
+        # CASE streaming on a pinned thread
+        names = []
+        async for name in Topping.aobjects.order_by("name").values_list("name", flat=True).iterator(chunk_size=1):
+            names.append(name)
+        self.assertEqual(names, ["Bacon", "Mushroom", "Random"])
+
+        # CASE transaction on a pinned thread
+        get_thread_name = lambda: database_sync_to_async(lambda: threading.current_thread().name)()
+        with self.assertRaises(ValueError):
+            async with aatomic():
+                await Topping.aobjects.filter(name="Bacon").update(name="Ham")
+                thread_names = await asyncio.gather(*[get_thread_name() for _ in range(4)])
+                self.assertEqual(len(set(thread_names)), 1)
+                self.assertTrue(thread_names[0].startswith("asgimod-default-pinned"))
+                self.assertEqual(await Topping.aobjects.filter(name="Ham").count(), 1)
+                async for name in Topping.aobjects.order_by("name").values_list("name", flat=True).iterator(chunk_size=1):
+                    names.append(name)
+                raise ValueError
+        self.assertEqual(names[3:], ["Ham", "Mushroom", "Random"])
+        self.assertEqual(await Topping.aobjects.filter(name="Ham").count(), 0)
+        self.assertTrue((await get_thread_name()).startswith("asgimod-default_"))
+
+    @async_to_sync
+    async def test_pinned_connections(self):
+        await Box.aobjects.using("other").bulk_create([Box(name=f"Box {i}") for i in range(5)])
+
+        # CASE streams keep their connection between chunks
+        names = [box.name async for box in Box.aobjects.using("other").order_by("id").iterator(chunk_size=2)]
+        self.assertEqual(names, [f"Box {i}" for i in range(5)])
+        async with aatomic("other"):
+            await Box.aobjects.using("other").filter(name="Box 0").update(name="Box 5")
+            self.assertEqual(await Box.aobjects.using("other").filter(name="Box 5").count(), 1)
+        self.assertEqual(await Box.aobjects.using("other").filter(name="Box 5").count(), 1)
+
+    @async_to_sync
+    async def test_aatomic_agather(self):
+        await Box.aobjects.create(id=1, name="orig")
+
+        async def update_then_fail():
+            async with aatomic():
+                await Box.aobjects.filter(id=1).update(name="changed")
+                raise ValueError
+
+        # CASE transactions within batches are rolled back
+        results = await agather(Price.aobjects.count(), update_then_fail(), return_exceptions=True)
+        self.assertEqual(results[0], 0)
+        self.assertIsInstance(results[1], ValueError)
+        self.assertEqual(await Box.aobjects.values_list("name", flat=True).eval(), ["orig"])
+
+
+@unittest.skipIf(engines.aiosqlite is None, "requires aiosqlite")
+@override_settings(ASGIMOD={"DRIVERS": {"default": "asgimod.engines.SQLiteDriver"}})
+class AsyncEngineTestCase(TransactionTestCase):
+
+    @async_to_sync
+    async def test_sqlite_driver(self):
+        price = await Price.aobjects.create(amount=Decimal("9.99"), currency="usd")
+        await Price.aobjects.create(amount=Decimal("29.99"), currency="eur")
+        await Pizza.aobjects.create(name="Thicc Pizza", price=price)
+        try:
+            self.assertIsInstance(engines.get_driver("default"), engines.SQLiteDriver)
+
+            # CASE models
+            async with capture_queries() as queries:
+                prices = await Price.aobjects.order_by("amount").eval()
+            self.assertEqual(await count_queries(queries), 0)
+            self.assertEqual([(p.amount, p.currency) for p in prices], [(Decimal("9.99"), "usd"), (Decimal("29.99"), "eur")])
+            self.assertEqual(prices[0], price)
+            self.assertEqual(prices[0]._state.db, "default")
+            self.assertEqual(prices[0]._state.adding, False)
+
+            # CASE values and values_list
+            prices = await Price.aobjects.filter(currency="eur").values("amount", "currency").eval()
+            self.assertEqual(prices, [{"amount": Decimal("29.99"), "currency": "eur"}])
+            amounts = await Price.aobjects.order_by("-amount").values_list("amount", flat=True).eval()
+            self.assertEqual(amounts, [Decimal("29.99"), Decimal("9.99")])
+            rows = await Price.aobjects.order_by("amount").rows("amount", "currency", named=True).eval()
+            self.assertEqual([row.as_dict() for row in rows], [{"amount": Decimal("9.99"), "currency": "usd"}, {"amount": Decimal("29.99"), "currency": "eur"}])
+
+            # CASE annotate and select_related
+            prices = await Price.aobjects.annotate(double=F("amount") * 2).filter(currency="usd").eval()
+            self.assertEqual(prices[0].double, Decimal("19.98"))
+            pizzas = await Pizza.aobjects.select_related("price").eval()
+            self.assertEqual(pizzas[0].price.amount, Decimal("9.99"))
+
+            # CASE empty queries
+            self.assertEqual(await Price.aobjects.none().eval(), [])
+            self.assertEqual(await Price.aobjects.filter(id__in=[]).eval(), [])
+        finally:
+            await engines.close_drivers()
+
+    @async_to_sync
+    async def test_sqlite_driver_wrappers(self):
+        await Price.aobjects.create(amount=Decimal("9.99"), currency="usd")
+        await Box.aobjects.create(name="box")
+        try:
+            # CASE instrumentation
+            records = []
+            sink = CallbackSink(records.append)
+            add_sink(sink)
+            try:
+                await Price.aobjects.all().eval()
+            finally:
+                remove_sink(sink)
+            self.assertEqual([(r.method, r.model, r.using, r.rows) for r in records], [("execute", "testapp.Price", "default", 1)])
+
+            # CASE slow queries
+            with override_settings(ASGIMOD={"DRIVERS": {"default": "asgimod.engines.SQLiteDriver"}, "SLOW_QUERIES": {"THRESHOLD": 0, "EXPLAIN": False}}):
+                with self.assertLogs("asgimod.slow_queries", "WARNING") as logs:
+                    await Price.aobjects.all().eval()
+            self.assertEqual(len(logs.records), 1)
+            self.assertIn("testapp_price", logs.records[0].asgimod_slow_query.sql)
+
+            # CASE statement interrupted on timeout
+            slow_qs = Box.aobjects.extra(where=["(WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < 20000000) SELECT count(*) FROM c) > 0"])
+            start = time.monotonic()
+            with self.assertRaises(asyncio.TimeoutError):
+                await slow_qs.timeout(0.05).eval()
+            self.assertEqual(len(await Box.aobjects.timeout(1).eval()), 1)
+            self.assertLess(time.monotonic() - start, 2)
+        finally:
+            await engines.close_drivers()
+
+    def test_sqlite_driver_shutdown(self):
+        drivers, sent = [], []
+
+        async def app(scope, receive, send):
+            await Price.aobjects.all().eval()
+            drivers.append(engines.get_driver("default"))
+
+        messages = iter([{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}])
+
+        async def receive():
+            return next(messages)
+
+        async def send(message):
+            sent.append(message["type"])
+
+        async def serve():
+            middleware = engines.DriversMiddleware(app)
+            await middleware({"type": "http"}, None, None)
+            await middleware({"type": "lifespan"}, receive, send)
+
+        # CASE drivers closed on lifespan shutdown
+        asyncio.run(serve())
+        self.assertEqual(sent, ["lifespan.startup.complete", "lifespan.shutdown.complete"])
+        self.assertIsNone(drivers[0]._connection)
+        self.assertEqual(len(engines._drivers), 0)
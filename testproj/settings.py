@@ -78,7 +78,13 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    },
+    'other': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db_other.sqlite3',
+        # NOTE: A FILE DATABASE, IN-MEMORY TEST DATABASES IGNORE `close()`.
+        'TEST': {'NAME': BASE_DIR / 'test_db_other.sqlite3'},
+    },
 }
 
 